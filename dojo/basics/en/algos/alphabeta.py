@@ -0,0 +1,334 @@
+import math
+import time
+
+import numpy as np
+
+from minmax import EXACT, LOWER, UPPER
+from mnk import SearchResult, SearchTimeout
+from tree import AlphaBetaNode, Game, StatsVisitor, alphabeta
+
+# Alpha-beta for any game
+# ------------------------------------------
+# Negamax alpha-beta over a tree.Game whose states are hashable. Scores are
+# from the side to move's point of view. A game may define evaluate(state)
+# for that score; otherwise terminal states score 1 - 2 * reward() (the last
+# mover's win is the side to move's loss) and unfinished states at the depth
+# limit score 0. Only alternating two-player games fit negamax.
+#
+# Against tree.alphabeta() on the same AlphaBetaNode trees (see
+# compare_node_counts()), the gain depends on how well the evaluations of
+# inner nodes order the moves. With exact inner values it visits about 4 to 7
+# times fewer nodes on trees of 65,000 to 1.7 million leaves; as the values get
+# noisier the gain falls to nothing, since the shallow iterations then cost
+# about as much as the ordering saves. It is not orders of magnitude. Games
+# where positions repeat gain more from the table: solving tic-tac-toe takes
+# 7,935 nodes against 18,297 for plain alpha-beta.
+
+def reward_evaluate(game):
+    """
+    Default evaluation from Game.reward() for games without evaluate().
+    """
+    def evaluate(state):
+        if game.is_terminal(state):
+            return 1 - 2 * game.reward(state)
+        return 0
+    return evaluate
+
+class FixedTranspositionTable:
+    """
+    Transposition table with a fixed number of slots, indexed by hash(state) % size.
+
+    A slot holds (key, depth, score, bound, move, generation). On a collision the
+    new entry replaces the old one when the old one is from an earlier search
+    (generation), is for the same state, or was searched no deeper. Deep entries
+    from the current search are kept. The table never grows.
+    """
+    def __init__(self, size=1 << 18):
+        self.size = size
+        self.slots = [None] * size
+        self.generation = 0
+
+    def new_search(self):
+        """
+        Ages every entry, so the next search may overwrite them freely.
+        """
+        self.generation += 1
+
+    def probe(self, key):
+        """
+        Return (depth, score, bound, move) for key, or None.
+        """
+        slot = self.slots[key % self.size]
+        if slot is None or slot[0] != key:
+            return None
+        return slot[1:5]
+
+    def store(self, key, depth, score, bound, move):
+        index = key % self.size
+        slot = self.slots[index]
+        if slot is None or slot[0] == key or slot[5] != self.generation or depth >= slot[1]:
+            self.slots[index] = (key, depth, score, bound, move, self.generation)
+
+    def clear(self):
+        self.slots = [None] * self.size
+
+class AlphaBetaTreeGame(Game):
+    """
+    An AlphaBetaNode tree as a Game, so AlphaBetaSearch can search the trees
+    tree.alphabeta() takes. States are (node, maximizing) pairs, hashed by node
+    identity; moves are child positions. node.value is the score for the
+    maximizing player, of inner nodes too, where it is the heuristic value at
+    the depth limit.
+    """
+    alternating = True
+
+    def legal_moves(self, state):
+        return list(range(len(state[0].children)))
+
+    def apply(self, state, move):
+        node, maximizing = state
+        return node.children[move], not maximizing
+
+    def is_terminal(self, state):
+        return not state[0].children
+
+    def reward(self, state):
+        raise NotImplementedError("AlphaBetaNode trees are scored with evaluate()")
+
+    def evaluate(self, state):
+        node, maximizing = state
+        return node.value if maximizing else -node.value
+
+def random_alphabeta_tree(branching, depth, noise=0.0, seed=0):
+    """
+    Uniform AlphaBetaNode tree with integer leaf values in [-100, 100]. Inner
+    nodes hold their minimax value plus Gaussian noise of the given spread.
+
+    Returns:
+        tuple: (root, minimax value of the root).
+    """
+    rng = np.random.default_rng(seed)
+
+    def build(level, maximizing):
+        node = AlphaBetaNode(int(rng.integers(-100, 101)))
+        if level == 0:
+            return node, node.value
+        pairs = [build(level - 1, not maximizing) for _ in range(branching)]
+        node.children = [child for child, _ in pairs]
+        values = [value for _, value in pairs]
+        exact = max(values) if maximizing else min(values)
+        node.value = exact + (rng.normal(0, noise) if noise else 0)
+        return node, exact
+
+    return build(depth, True)
+
+def compare_node_counts(shapes=((4, 8), (8, 6), (6, 8)), noises=(0, 5, 20), seed=0):
+    """
+    Nodes visited by tree.alphabeta() and by AlphaBetaSearch to the full depth
+    on the same random trees, which both must solve to the same value.
+
+    Args:
+        shapes (tuple): (branching, depth) of each tree.
+        noises (tuple): Spreads of the inner node values to try.
+
+    Returns:
+        list: (branching, depth, noise, plain nodes, PVS nodes) per tree.
+    """
+    rows = []
+    for branching, depth in shapes:
+        for noise in noises:
+            root, exact = random_alphabeta_tree(branching, depth, noise, seed)
+            visitor = StatsVisitor()
+            plain = alphabeta(root, -math.inf, math.inf, True, visitor)
+            engine = AlphaBetaSearch(AlphaBetaTreeGame(), tt_size=1 << 20, epsilon=1 if noise == 0 else 1e-9)
+            result = engine.search((root, True), depth)
+            assert plain == exact and abs(result.score - exact) < 1e-6, (plain, result.score, exact)
+            rows.append((branching, depth, noise, visitor.expansions, engine.nodes))
+    return rows
+
+class AlphaBetaSearch:
+    """
+    Alpha-beta search with a transposition table, principal variation search
+    (negascout) and iterative deepening with aspiration windows.
+
+    The transposition table keeps each node's best move between iterations and
+    between searches, and that move is always searched first. Root moves are
+    ordered by their scores from the previous iteration.
+    """
+    def __init__(self, game, evaluate=None, tt_size=1 << 18, epsilon=1):
+        """
+        Args:
+            game (tree.Game): Rules with hashable states and alternating players.
+            evaluate (callable): evaluate(state) -> score for the side to move;
+                defaults to game.evaluate, then to reward_evaluate(game).
+            tt_size (int): Number of transposition table slots.
+            epsilon (float): Width of the null windows. 1 suits integer scores;
+                any positive value gives correct results.
+        """
+        if not game.alternating:
+            raise ValueError("negamax needs a game where the players alternate")
+        self.game = game
+        self.evaluate = evaluate or getattr(game, "evaluate", None) or reward_evaluate(game)
+        self.tt = FixedTranspositionTable(tt_size)
+        self.epsilon = epsilon
+        self.nodes = 0
+        self.deadline = math.inf
+
+    def order(self, moves, first):
+        """
+        Move first (the transposition table move) to the front of moves.
+        """
+        if first is not None and first in moves:
+            moves.remove(first)
+            moves.insert(0, first)
+        return moves
+
+    def negamax(self, state, depth, alpha, beta):
+        """
+        Fail-soft PVS score of state for the side to move.
+        """
+        self.nodes += 1
+        if self.nodes & 1023 == 0 and time.monotonic() > self.deadline:
+            raise SearchTimeout()
+
+        game = self.game
+        if depth == 0 or game.is_terminal(state):
+            return self.evaluate(state)
+
+        key = hash(state)
+        entry = self.tt.probe(key)
+        tt_move = None
+        if entry is not None:
+            entry_depth, score, bound, tt_move = entry
+            if entry_depth >= depth and (bound == EXACT
+                                         or (bound == LOWER and score >= beta)
+                                         or (bound == UPPER and score <= alpha)):
+                return score
+
+        alpha_original = alpha
+        best_score = -math.inf
+        best_move = None
+        for i, move in enumerate(self.order(list(game.legal_moves(state)), tt_move)):
+            child = game.apply(state, move)
+            if i == 0:
+                score = -self.negamax(child, depth - 1, -beta, -alpha)
+            else:
+                # Null window: only prove the move is no better than the best so far
+                score = -self.negamax(child, depth - 1, -alpha - self.epsilon, -alpha)
+                if alpha < score < beta:
+                    score = -self.negamax(child, depth - 1, -beta, -alpha)  # It is better: full re-search
+            if score > best_score:
+                best_score = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+
+        if best_score <= alpha_original:
+            bound = UPPER
+        elif best_score >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.tt.store(key, depth, best_score, bound, best_move)
+        return best_score
+
+    def search_root(self, state, depth, alpha, beta, moves, scores):
+        """
+        PVS over the root moves in the given order. scores is filled in with
+        each move's score (or bound) for ordering the next iteration.
+
+        Returns:
+            tuple: (move, score) of the best root move.
+        """
+        game = self.game
+        best_score = -math.inf
+        best_move = None
+        for i, move in enumerate(moves):
+            child = game.apply(state, move)
+            if i == 0:
+                score = -self.negamax(child, depth - 1, -beta, -alpha)
+            else:
+                score = -self.negamax(child, depth - 1, -alpha - self.epsilon, -alpha)
+                if alpha < score < beta:
+                    score = -self.negamax(child, depth - 1, -beta, -alpha)
+            scores[move] = score
+            if score > best_score:
+                best_score = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        return best_move, best_score
+
+    def search(self, state, max_depth, time_budget=None, window=None):
+        """
+        Iterative deepening from depth 1 to max_depth.
+
+        From depth 2 on, each iteration first searches a window of +/- window
+        around the previous score and widens the failing side to infinity when
+        the score falls outside it.
+
+        Args:
+            state: Root state; the side to move is the one searched for.
+            max_depth (int): Deepest iteration.
+            time_budget (float): Optional seconds of wall-clock time.
+            window (float): Aspiration half-width; defaults to 2 * epsilon.
+
+        Returns:
+            SearchResult: The best move, its score and the last completed depth.
+            move is None when the root is terminal.
+        """
+        game = self.game
+        window = 2 * self.epsilon if window is None else window
+        self.deadline = math.inf if time_budget is None else time.monotonic() + time_budget
+        self.tt.new_search()
+        result = SearchResult(None, self.evaluate(state), 0)
+        if game.is_terminal(state):
+            return result
+
+        moves = list(game.legal_moves(state))
+        scores = {}
+        for depth in range(1, max_depth + 1):
+            alpha, beta = -math.inf, math.inf
+            if depth > 1:
+                alpha, beta = result.score - window, result.score + window
+                # The previous iteration's best move first, then by its score
+                moves.sort(key=lambda move: scores.get(move, -math.inf), reverse=True)
+                self.order(moves, result.move)
+            try:
+                while True:
+                    move, score = self.search_root(state, depth, alpha, beta, moves, scores)
+                    if score <= alpha:
+                        alpha = -math.inf  # Failed low: widen downwards and search again
+                    elif score >= beta:
+                        beta = math.inf  # Failed high
+                    else:
+                        break
+            except SearchTimeout:
+                break
+            result = SearchResult(move, score, depth)
+        return result
+
+
+# Example usage
+if __name__ == "__main__":
+    from tree import TicTacToeGame
+
+    game = TicTacToeGame()
+    engine = AlphaBetaSearch(game)
+    print(engine.search((0,) * 9, max_depth=9))  # A draw
+    print("Nodes:", engine.nodes)
+
+    board = (0, 0, 0,
+             0, -1, 0,
+             1, 1, -1)
+    engine.nodes = 0
+    print(engine.search(board, max_depth=9))  # X must block on square 0
+    print("Nodes:", engine.nodes)  # Entries from the first search are reused
+
+    # Plain alpha-beta against this engine on the trees tree.alphabeta() takes
+    for branching, depth, noise, plain, pvs in compare_node_counts():
+        print(f"b={branching} d={depth} noise={noise:2d}: {plain:7d} vs {pvs:7d} nodes ({plain / pvs:.1f}x)")
@@ -0,0 +1,187 @@
+import numpy as np
+
+from modrange import modrange_array
+
+# Bounding boxes across the antimeridian
+# ------------------------------------------
+# Boxes are (west, south, east, north) in degrees. A box whose west edge is
+# greater than its east edge crosses the antimeridian, as in GeoJSON; east may
+# also be given unwrapped past 180 (e.g. west=170, east=190). All functions take
+# arrays of boxes and work on the whole batch at once.
+
+MAX_LATITUDE = 85.0511287798066  # Web Mercator limit, where tiles are square
+
+def normalize_lon_intervals(west, east):
+    """
+    Wraps longitude intervals so west lies in [-180, 180).
+
+    Args:
+        west (np.ndarray): West edges in degrees.
+        east (np.ndarray): East edges in degrees.
+
+    Returns:
+        tuple: (west, east, full) arrays. east = west + width with a width in
+        [0, 360], so east may exceed 180 for intervals crossing the antimeridian.
+        full is True where the interval covers every longitude, i.e. where
+        east - west >= 360.
+    """
+    west = np.asarray(west, dtype=np.float64)
+    east = np.asarray(east, dtype=np.float64)
+    span = east - west
+    full = span >= 360
+    width = np.mod(span, 360)  # west > east crosses the antimeridian, however far apart they are
+    full |= width >= 360  # mod rounds up to 360 for spans just below a multiple of 360
+    west = np.mod(west + 180, 360) - 180
+    west = np.where(west >= 180, west - 360, west)  # mod can round up to 360 just below -180
+    west = np.where(full, -180.0, west)
+    east = np.where(full, 180.0, west + width)
+    return west, east, full
+
+def split_antimeridian(west, south, east, north):
+    """
+    Splits boxes that cross the antimeridian into at most two boxes each.
+
+    Returns:
+        tuple: (index, parts) where parts is a (K, 4) array of boxes with
+        -180 <= west <= east <= 180 and index[k] the input box of parts[k].
+        Parts are ordered by input box, then by west edge.
+    """
+    west, east, _ = normalize_lon_intervals(west, east)
+    west, south, east, north = np.broadcast_arrays(*np.atleast_1d(west, np.asarray(south, dtype=np.float64),
+                                                                   east, np.asarray(north, dtype=np.float64)))
+    crossing = east > 180
+
+    # Every box keeps the part from its west edge; crossing boxes add the part
+    # that wraps around to -180.
+    index = np.arange(len(west))
+    first = np.column_stack([west, south, np.minimum(east, 180.0), north])
+    wrapped = np.column_stack([np.full(crossing.sum(), -180.0), south[crossing],
+                               east[crossing] - 360, north[crossing]])
+    index = np.concatenate([index, index[crossing]])
+    parts = np.concatenate([first, wrapped])
+    order = np.lexsort((parts[:, 0], index))  # By input box, then west edge
+    return index[order], parts[order]
+
+def lat_to_tile_y(lat, zoom):
+    """
+    Continuous Web Mercator tile row for latitudes in degrees (0 at the top).
+    """
+    lat = np.radians(np.clip(lat, -MAX_LATITUDE, MAX_LATITUDE))
+    return (1 - np.log(np.tan(lat) + 1 / np.cos(lat)) / np.pi) / 2 * (1 << zoom)
+
+def tile_ranges(west, south, east, north, zoom):
+    """
+    XYZ tile ranges covering each box at a zoom level.
+
+    Column ranges are found on unwrapped tile columns and folded back onto the
+    2**zoom columns with modrange_array; boxes whose columns wrap past the
+    antimeridian are split in two.
+
+    Returns:
+        tuple: (index, xmin, xmax, ymin, ymax) arrays with inclusive tile ranges,
+        at most two per box, and index[k] the input box of range k.
+    """
+    n = 1 << zoom
+    west, east, _ = normalize_lon_intervals(west, east)
+    west, south, east, north = np.broadcast_arrays(*np.atleast_1d(west, np.asarray(south, dtype=np.float64),
+                                                                   east, np.asarray(north, dtype=np.float64)))
+
+    # Unwrapped columns: west lands in [0, n), east may run past n - 1.
+    # A box edge on a tile boundary does not touch the next tile.
+    col_min = np.floor((west + 180) / 360 * n).astype(np.int64)
+    col_max = np.maximum(np.ceil((east + 180) / 360 * n).astype(np.int64) - 1, col_min)
+    lo, hi = modrange_array(col_min, col_max, n)
+    wraps = (col_max >= n) & (col_max - col_min + 1 < n)  # Otherwise lo, hi is every column
+
+    row_min = np.clip(np.floor(lat_to_tile_y(north, zoom)).astype(np.int64), 0, n - 1)
+    row_max = np.clip(np.ceil(lat_to_tile_y(south, zoom)).astype(np.int64) - 1, row_min, n - 1)
+
+    # Boxes that do not wrap keep the folded range; wrapping boxes become
+    # [col_min, n - 1] and [0, col_max - n].
+    index = np.arange(len(west))
+    xmin = np.where(wraps, col_min, lo)
+    xmax = np.where(wraps, n - 1, hi)
+    index = np.concatenate([index, index[wraps]])
+    xmin = np.concatenate([xmin, np.zeros(wraps.sum(), dtype=np.int64)])
+    xmax = np.concatenate([xmax, col_max[wraps] - n])
+    ymin = np.concatenate([row_min, row_min[wraps]])
+    ymax = np.concatenate([row_max, row_max[wraps]])
+    order = np.argsort(index, kind="stable")
+    return index[order], xmin[order], xmax[order], ymin[order], ymax[order]
+
+def enumerate_tiles(index, xmin, xmax, ymin, ymax):
+    """
+    Expands tile ranges into individual tiles without Python loops.
+
+    Returns:
+        tuple: (index, x, y) arrays, one entry per tile.
+    """
+    heights = ymax - ymin + 1
+    counts = (xmax - xmin + 1) * heights
+    starts = np.cumsum(counts) - counts
+    part = np.repeat(np.arange(len(counts)), counts)
+    offset = np.arange(counts.sum()) - starts[part]
+    return index[part], xmin[part] + offset // heights[part], ymin[part] + offset % heights[part]
+
+def validate_tile_ranges(num_boxes=3000, zoom=3, samples=2000, seed=0):
+    """
+    Checks split_antimeridian and tile_ranges on random boxes, including
+    boxes with west - east beyond 360 and full-globe boxes. Each box's
+    interior is sampled densely and every sampled tile must be covered.
+
+    Raises:
+        AssertionError: On the first box that is split or tiled wrongly.
+    """
+    rng = np.random.default_rng(seed)
+    n = 1 << zoom
+    west = rng.uniform(-540, 540, num_boxes)
+    east = rng.uniform(-540, 540, num_boxes)
+    east[:10] = west[:10] + 360  # Full globe
+    south = rng.uniform(-80, 70, num_boxes)
+    north = south + rng.uniform(0.1, 10, num_boxes)
+    norm_west, norm_east, _ = normalize_lon_intervals(west, east)
+    assert ((norm_west >= -180) & (norm_west < 180) & (norm_east >= norm_west)).all()
+
+    index, parts = split_antimeridian(west, south, east, north)
+    assert (parts[:, 0] <= parts[:, 2]).all() and (parts[:, 0] >= -180).all() and (parts[:, 2] <= 180).all()
+    widths = np.bincount(index, weights=parts[:, 2] - parts[:, 0], minlength=num_boxes)
+    assert np.allclose(widths, norm_east - norm_west)
+
+    ranges = tile_ranges(west, south, east, north, zoom)
+    assert ((ranges[1] >= 0) & (ranges[1] <= ranges[2]) & (ranges[2] < n)).all()
+    tile_index, x, y = enumerate_tiles(*ranges)
+    covered = set(zip(tile_index.tolist(), x.tolist(), y.tolist()))
+    t = (np.arange(samples) + 0.5) / samples  # Interior points only, away from the box edges
+    for i in range(num_boxes):
+        lon = norm_west[i] + t * (norm_east[i] - norm_west[i])
+        lat = south[i] + t * (north[i] - south[i])
+        columns = np.floor(np.mod(lon + 180, 360) / 360 * n).astype(np.int64) % n
+        rows = np.floor(lat_to_tile_y(lat, zoom)).astype(np.int64)
+        for column in np.unique(columns).tolist():
+            for row in np.unique(rows).tolist():
+                assert (i, column, row) in covered, (west[i], east[i], column, row)
+
+
+# Example usage
+if __name__ == "__main__":
+    # Fiji straddles the antimeridian; the second box is the whole world,
+    # the third an ordinary box over Europe and the fourth a 350 degree band
+    # given with west - east beyond 360.
+    west = np.array([177.0, -180.0, -10.0, 200.0])
+    south = np.array([-21.0, -85.0, 35.0, -10.0])
+    east = np.array([-178.0, 180.0, 30.0, -170.0])
+    north = np.array([-12.0, 85.0, 60.0, 10.0])
+
+    print(normalize_lon_intervals(west, east))
+    index, parts = split_antimeridian(west, south, east, north)
+    print(index)  # Output: [0 0 1 2 3 3]
+    print(parts)
+
+    ranges = tile_ranges(west, south, east, north, zoom=3)
+    print(np.column_stack(ranges))  # index, xmin, xmax, ymin, ymax
+    tiles = enumerate_tiles(*ranges)
+    print(np.bincount(tiles[0]))  # Tiles per box
+
+    print(split_antimeridian(west, 0.0, east, 10.0)[0])  # Scalar latitudes broadcast too
+    validate_tile_ranges()
+    print("tile_ranges agrees with sampled tiles")
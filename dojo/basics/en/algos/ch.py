@@ -0,0 +1,323 @@
+import heapq
+import math
+
+import numpy as np
+
+from graph import CSRGraph
+
+# Contraction hierarchies
+# ------------------------------------------
+# Preprocessing contracts the nodes of a CSRGraph one at a time, least
+# important first. Contracting v removes it from the graph; for every pair of
+# remaining neighbours u -> v -> x whose cheapest path runs through v, a
+# shortcut u -> x is added with v as its middle node. A node's rank is its
+# position in that order.
+#
+# Every edge of the result, original or shortcut, leads from a lower to a
+# higher ranked node in one of two upward graphs:
+#   up[v]   edges v -> x with rank[x] > rank[v], searched forward from the source
+#   down[v] edges u -> v with rank[u] > rank[v], searched backward from the target
+# Any cheapest path has a cheapest equivalent that climbs in up and descends
+# in down, so a query only runs two small upward searches.
+
+NO_MIDDLE = -1  # Middle node of an original (non-shortcut) edge
+
+class ContractionHierarchy:
+    """
+    Upward graphs of a contraction hierarchy, as CSR arrays.
+
+    up_* and down_* are (indptr, indices, weights, middle) arrays laid out like
+    a CSRGraph, with middle[e] the contracted node a shortcut bypasses.
+    """
+    def __init__(self, rank, up, down, names=None):
+        self.rank = np.asarray(rank, dtype=np.int64)
+        self.up = tuple(np.asarray(array) for array in up)
+        self.down = tuple(np.asarray(array) for array in down)
+        self.names = None if names is None else np.asarray(names)
+
+    @property
+    def num_nodes(self):
+        return len(self.rank)
+
+    @property
+    def num_shortcuts(self):
+        return int((self.up[3] != NO_MIDDLE).sum() + (self.down[3] != NO_MIDDLE).sum())
+
+    def save(self, path):
+        """
+        Writes the hierarchy to an .npz file.
+        """
+        arrays = {"rank": self.rank}
+        for prefix, arrays_of_side in (("up", self.up), ("down", self.down)):
+            for field, array in zip(("indptr", "indices", "weights", "middle"), arrays_of_side):
+                arrays[f"{prefix}_{field}"] = array
+        if self.names is not None:
+            arrays["names"] = self.names
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads a hierarchy written by save().
+        """
+        with np.load(path, allow_pickle=False) as data:
+            side = lambda prefix: tuple(data[f"{prefix}_{field}"]
+                                        for field in ("indptr", "indices", "weights", "middle"))
+            names = data["names"] if "names" in data.files else None
+            return cls(data["rank"], side("up"), side("down"), names)
+
+    def edges(self, side, node):
+        """
+        (neighbour, weight, middle) triples of node in the up (0) or down (1) graph.
+        """
+        indptr, indices, weights, middle = self.up if side == 0 else self.down
+        start, end = indptr[node], indptr[node + 1]
+        return zip(indices[start:end].tolist(), weights[start:end].tolist(), middle[start:end].tolist())
+
+    def unpack(self, tail, head, weight, middle):
+        """
+        Expands the edge tail -> head into original edges.
+
+        Returns:
+            list: (head, weight) for each original edge, in path order.
+        """
+        if middle == NO_MIDDLE:
+            return [(head, weight)]
+        # The middle node ranks below both ends: tail -> middle is a down edge
+        # stored at middle, middle -> head an up edge stored at middle
+        first = next((w, m) for u, w, m in self.edges(1, middle) if u == tail)
+        second = next((w, m) for x, w, m in self.edges(0, middle) if x == head)
+        return self.unpack(tail, middle, *first) + self.unpack(middle, head, *second)
+
+    def query(self, source, target):
+        """
+        Cheapest path between two node ids by bidirectional upward search.
+
+        The cost is summed along the unpacked path edge by edge from the
+        source, the same way ucs() accumulates it, so it equals Dijkstra's
+        distance exactly (bit for bit with integer weights).
+
+        Returns:
+            tuple: (cost, path) with the path as a list of node ids, or
+            (inf, None) when target cannot be reached.
+        """
+        if source == target:
+            return 0, [source]
+        dist = ({source: 0}, {target: 0})
+        pred = ({source: None}, {target: None})  # node -> (previous node, weight, middle)
+        settled = (set(), set())
+        queues = ([(0, source)], [(0, target)])
+        best, meet = math.inf, None
+
+        # Each side stops once its cheapest open entry cannot beat best
+        while (queues[0] and queues[0][0][0] < best) or (queues[1] and queues[1][0][0] < best):
+            if not queues[1] or queues[1][0][0] >= best:
+                side = 0
+            elif not queues[0] or queues[0][0][0] >= best:
+                side = 1
+            else:
+                side = 0 if queues[0][0][0] <= queues[1][0][0] else 1
+            cost, node = heapq.heappop(queues[side])
+            if node in settled[side]:
+                continue
+            settled[side].add(node)
+            other = dist[1 - side].get(node)
+            if other is not None and cost + other < best:
+                best, meet = cost + other, node
+            for child, weight, middle in self.edges(side, node):
+                new_cost = cost + weight
+                if new_cost < dist[side].get(child, math.inf):
+                    dist[side][child] = new_cost
+                    pred[side][child] = (node, weight, middle)
+                    heapq.heappush(queues[side], (new_cost, child))
+
+        if meet is None:
+            return math.inf, None
+
+        # Hierarchy edges from source to meet, then from meet to target
+        hops = []
+        node = meet
+        while pred[0][node] is not None:
+            previous, weight, middle = pred[0][node]
+            hops.append((previous, node, weight, middle))
+            node = previous
+        hops.reverse()
+        node = meet
+        while pred[1][node] is not None:
+            following, weight, middle = pred[1][node]
+            hops.append((node, following, weight, middle))
+            node = following
+
+        path = [source]
+        cost = 0
+        for hop in hops:
+            for head, weight in self.unpack(*hop):
+                path.append(head)
+                cost += weight
+        return cost, path
+
+    def distance(self, source, target):
+        """
+        Cost of the cheapest path between two node ids, or inf.
+        """
+        return self.query(source, target)[0]
+
+
+class _Contractor:
+    """
+    Working state of build_ch(): the remaining graph as per-node dicts of
+    neighbour -> (weight, middle), with parallel edges reduced to the cheapest.
+    """
+    def __init__(self, graph, witness_limit):
+        n = graph.num_nodes
+        self.witness_limit = witness_limit
+        self.out_edges = [{} for _ in range(n)]
+        self.in_edges = [{} for _ in range(n)]
+        sources = np.repeat(np.arange(n), np.diff(graph.indptr))
+        for u, x, w in zip(sources.tolist(), graph.indices.tolist(), graph.weights.tolist()):
+            if u != x and w < self.out_edges[u].get(x, (math.inf,))[0]:
+                self.out_edges[u][x] = self.in_edges[x][u] = (w, NO_MIDDLE)
+        self.contracted_neighbours = [0] * n
+        self.up = [[] for _ in range(n)]
+        self.down = [[] for _ in range(n)]
+
+    def witness_distances(self, source, skip, limit):
+        """
+        Costs of paths from source that avoid skip, searching no further than
+        limit or witness_limit settled nodes. Every cost found is a real path
+        cost, so an early stop only ever adds extra shortcuts.
+        """
+        dist = {source: 0}
+        queue = [(0, source)]
+        settled = 0
+        while queue:
+            cost, node = heapq.heappop(queue)
+            if cost > dist[node]:
+                continue
+            if cost > limit or settled >= self.witness_limit:
+                break
+            settled += 1
+            for child, (weight, _) in self.out_edges[node].items():
+                if child == skip:
+                    continue
+                new_cost = cost + weight
+                if new_cost < dist.get(child, math.inf):
+                    dist[child] = new_cost
+                    heapq.heappush(queue, (new_cost, child))
+        return dist
+
+    def shortcuts(self, v):
+        """
+        Shortcuts needed to contract v, as (u, x, weight) triples.
+        """
+        result = []
+        outgoing = self.out_edges[v]
+        if not outgoing:
+            return result
+        max_out = max(weight for weight, _ in outgoing.values())
+        for u, (w_in, _) in self.in_edges[v].items():
+            dist = self.witness_distances(u, v, w_in + max_out)
+            for x, (w_out, _) in outgoing.items():
+                if x != u and dist.get(x, math.inf) > w_in + w_out:
+                    result.append((u, x, w_in + w_out))
+        return result
+
+    def priority(self, v):
+        """
+        Importance of v: shortcuts added minus edges removed (the edge
+        difference), plus its contracted neighbours to spread contraction evenly.
+        """
+        removed = len(self.in_edges[v]) + len(self.out_edges[v])
+        return len(self.shortcuts(v)) - removed + self.contracted_neighbours[v]
+
+    def contract(self, v):
+        """
+        Removes v, keeping its edges as upward edges and adding its shortcuts.
+        """
+        for u, x, weight in self.shortcuts(v):
+            if weight < self.out_edges[u].get(x, (math.inf,))[0]:
+                self.out_edges[u][x] = self.in_edges[x][u] = (weight, v)
+        for x, (weight, middle) in self.out_edges[v].items():
+            self.up[v].append((x, weight, middle))
+            del self.in_edges[x][v]
+            self.contracted_neighbours[x] += 1
+        for u, (weight, middle) in self.in_edges[v].items():
+            self.down[v].append((u, weight, middle))
+            del self.out_edges[u][v]
+            self.contracted_neighbours[u] += 1
+        self.out_edges[v] = {}
+        self.in_edges[v] = {}
+
+def _to_csr(adjacency):
+    """
+    (indptr, indices, weights, middle) arrays from per-node lists of triples.
+    """
+    indptr = np.zeros(len(adjacency) + 1, dtype=np.int64)
+    np.cumsum([len(edges) for edges in adjacency], out=indptr[1:])
+    flat = [edge for edges in adjacency for edge in edges]
+    indices = np.array([edge[0] for edge in flat], dtype=np.int64)
+    weights = np.array([edge[1] for edge in flat], dtype=np.float64)
+    middle = np.array([edge[2] for edge in flat], dtype=np.int64)
+    return indptr, indices, weights, middle
+
+def build_ch(graph, witness_limit=500):
+    """
+    Builds a contraction hierarchy for a CSRGraph with non-negative weights.
+
+    Nodes are contracted in order of priority() with lazy updates: the node at
+    the top of the heap is re-scored and only contracted if it still has the
+    lowest priority.
+
+    Args:
+        graph (CSRGraph): The road graph.
+        witness_limit (int): Settled nodes per witness search. Lower is faster
+            to build but adds more shortcuts; queries stay exact either way.
+
+    Returns:
+        ContractionHierarchy: The hierarchy, ready to query or save.
+    """
+    contractor = _Contractor(graph, witness_limit)
+    queue = [(contractor.priority(v), v) for v in range(graph.num_nodes)]
+    heapq.heapify(queue)
+    rank = np.empty(graph.num_nodes, dtype=np.int64)
+    contracted = np.zeros(graph.num_nodes, dtype=bool)
+    next_rank = 0
+    while queue:
+        _, v = heapq.heappop(queue)
+        if contracted[v]:
+            continue
+        priority = contractor.priority(v)
+        if queue and priority > queue[0][0]:
+            heapq.heappush(queue, (priority, v))  # Stale priority: try again later
+            continue
+        contractor.contract(v)
+        contracted[v] = True
+        rank[v] = next_rank
+        next_rank += 1
+    return ContractionHierarchy(rank, _to_csr(contractor.up), _to_csr(contractor.down), graph.names)
+
+
+# Example usage
+if __name__ == "__main__":
+    import os
+    import tempfile
+
+    # A 30 x 30 grid of two-way streets with integer travel times
+    rng = np.random.default_rng(0)
+    side = 30
+    ids = np.arange(side * side).reshape(side, side)
+    pairs = np.concatenate([np.column_stack([ids[:, :-1].ravel(), ids[:, 1:].ravel()]),
+                            np.column_stack([ids[:-1].ravel(), ids[1:].ravel()])])
+    times = rng.integers(1, 10, len(pairs))
+    graph = CSRGraph.from_edges(np.concatenate([pairs[:, 0], pairs[:, 1]]),
+                                np.concatenate([pairs[:, 1], pairs[:, 0]]),
+                                np.concatenate([times, times]))
+
+    hierarchy = build_ch(graph)
+    print("Shortcuts:", hierarchy.num_shortcuts)
+    path = os.path.join(tempfile.gettempdir(), "grid_ch.npz")
+    hierarchy.save(path)  # Preprocess once ...
+    hierarchy = ContractionHierarchy.load(path)  # ... and reuse for every query
+    cost, route = hierarchy.query(0, side * side - 1)
+    print("Cost:", cost, "hops:", len(route) - 1)
+    os.remove(path)
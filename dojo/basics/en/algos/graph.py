@@ -0,0 +1,274 @@
+import json
+import os
+
+import numpy as np
+
+# Compressed sparse row (CSR) graph
+# ------------------------------------------
+# Node ids are 0..num_nodes-1. The out-edges of node u are
+# indices[indptr[u]:indptr[u + 1]], with matching costs in weights.
+class CSRGraph:
+    """
+    Directed, weighted graph stored as three flat arrays plus optional node
+    names and (longitude, latitude) coordinates.
+    """
+    def __init__(self, indptr, indices, weights=None, names=None, coords=None):
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        if weights is None:
+            weights = np.ones(len(self.indices))
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.names = names if names is None or isinstance(names, NameIndex) else np.asarray(names)
+        self.coords = None if coords is None else np.asarray(coords, dtype=np.float64)
+        self._ids = None  # name -> id, built on first use
+        if len(self.indptr) == 0 or self.indptr[-1] != len(self.indices):
+            raise ValueError("indptr must end at len(indices)")
+        if len(self.weights) != len(self.indices):
+            raise ValueError("weights must have one entry per edge")
+
+    @property
+    def num_nodes(self):
+        return len(self.indptr) - 1
+
+    @property
+    def num_edges(self):
+        return len(self.indices)
+
+    def neighbors(self, node):
+        """
+        Heads of the out-edges of node, as a view into indices.
+        """
+        return self.indices[self.indptr[node]:self.indptr[node + 1]]
+
+    def edge_weights(self, node):
+        """
+        Costs of the out-edges of node, in the same order as neighbors(node).
+        """
+        return self.weights[self.indptr[node]:self.indptr[node + 1]]
+
+    def id(self, name):
+        """
+        Node id of a name.
+        """
+        if isinstance(self.names, NameIndex):
+            return self.names.id(name)  # Binary search, no dict to build
+        if self._ids is None:
+            if self.names is None:
+                raise ValueError("graph has no node names")
+            self._ids = {name: i for i, name in enumerate(self.names.tolist())}
+        return self._ids[name]
+
+    def name(self, node):
+        """
+        Name of a node id, or the id itself when the graph has no names.
+        """
+        return node if self.names is None else self.names[node]
+
+    def reverse(self):
+        """
+        Graph with every edge reversed, sharing the node names.
+        """
+        sources = np.repeat(np.arange(self.num_nodes), np.diff(self.indptr))
+        return CSRGraph.from_edges(self.indices, sources, self.weights, self.num_nodes, self.names, self.coords)
+
+    @classmethod
+    def from_edges(cls, sources, targets, weights=None, num_nodes=None, names=None, coords=None):
+        """
+        Build a graph from parallel arrays of edge tails, heads and costs.
+        Edges keep their input order within each node.
+        """
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        if num_nodes is None:
+            num_nodes = len(names) if names is not None else int(max(sources.max(initial=-1), targets.max(initial=-1))) + 1
+        order = np.argsort(sources, kind="stable")
+        indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=num_nodes), out=indptr[1:])
+        weights = None if weights is None else np.asarray(weights, dtype=np.float64)[order]
+        return cls(indptr, targets[order], weights, names, coords)
+
+    @classmethod
+    def from_dict(cls, adjacency):
+        """
+        Build a graph from a dict of node name -> children, like the tree in tree.py.
+        Children may also be a dict of child -> edge cost. Children that are not
+        keys of the dict become nodes without out-edges.
+        """
+        names = list(adjacency)
+        ids = {name: i for i, name in enumerate(names)}
+        sources, targets, weights = [], [], []
+        for name, children in adjacency.items():
+            costs = children.values() if isinstance(children, dict) else [1.0] * len(children)
+            for child, cost in zip(children, costs):
+                if child not in ids:
+                    ids[child] = len(names)
+                    names.append(child)
+                sources.append(ids[name])
+                targets.append(ids[child])
+                weights.append(cost)
+        return cls.from_edges(sources, targets, weights, len(names), names)
+
+def gather_ranges(starts, counts):
+    """
+    Concatenates the index ranges starts[i] .. starts[i] + counts[i] - 1
+    without a Python loop, e.g. the out-edge positions of a set of nodes
+    with starts = indptr[nodes] and counts = indptr[nodes + 1] - starts.
+
+    Returns:
+        np.ndarray: counts.sum() int64 positions, range by range.
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    counts = np.asarray(counts, dtype=np.int64)
+    offsets = np.cumsum(counts) - counts  # Where each range begins in the output
+    return np.repeat(starts - offsets, counts) + np.arange(counts.sum())
+
+
+# Node names without Python objects
+# ------------------------------------------
+class NameIndex:
+    """
+    Read-only node names kept as flat arrays, so they can live in a memory map.
+
+    Names are UTF-8 encoded and concatenated in data; name i is
+    data[offsets[i]:offsets[i + 1]]. order lists the node ids sorted by
+    encoded name, which id() binary-searches.
+    """
+    def __init__(self, data, offsets, order):
+        self.data = data
+        self.offsets = offsets
+        self.order = order
+
+    @classmethod
+    def from_names(cls, names):
+        """
+        Builds the index from a list of str names. Other types are rejected
+        rather than converted, since they would come back as strings.
+        """
+        for name in names:
+            if not isinstance(name, str):
+                raise TypeError(f"node names must be str to be stored, got {type(name).__name__}; "
+                                "convert them first, e.g. graph.names.astype(str)")
+        encoded = [name.encode("utf-8") for name in names]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(name) for name in encoded], out=offsets[1:])
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        order = np.array(sorted(range(len(encoded)), key=encoded.__getitem__), dtype=np.int64)
+        return cls(data, offsets, order)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def encoded(self, node):
+        return self.data[self.offsets[node]:self.offsets[node + 1]].tobytes()
+
+    def __getitem__(self, node):
+        """
+        Name of a node id, or an array of names for an array of ids.
+        """
+        if np.ndim(node):
+            return np.array([self[int(i)] for i in np.asarray(node).ravel()]).reshape(np.shape(node))
+        return self.encoded(node).decode("utf-8")
+
+    def tolist(self):
+        return [self[i] for i in range(len(self))]
+
+    def id(self, name):
+        """
+        Node id of a name, by binary search over the sorted order.
+        """
+        key = str(name).encode("utf-8")
+        lo, hi = 0, len(self.order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.encoded(self.order[mid]) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == len(self.order) or self.encoded(self.order[lo]) != key:
+            raise KeyError(name)
+        return int(self.order[lo])
+
+# Graph files
+# ------------------------------------------
+# One binary file per graph: an 8-byte magic, an 8-byte little-endian header
+# length, a JSON header mapping each array to its dtype, shape and offset, then
+# the arrays themselves, each starting on a 64-byte boundary. open_graph()
+# maps the arrays with np.memmap instead of reading them, so opening costs the
+# same for any size, and processes that open the same file share its pages
+# through the OS page cache. Open the file in each worker rather than passing
+# the graph itself, which would pickle a copy of the arrays.
+GRAPH_MAGIC = b"CSRGRAF1"
+ALIGNMENT = 64
+
+def save_graph(path, graph):
+    """
+    Writes a CSRGraph, with its names and coords if it has them, to path.
+    The file is written next to path and renamed into place. Names are stored
+    as UTF-8 strings, so they must be str; see NameIndex.from_names().
+    """
+    arrays = {"indptr": graph.indptr, "indices": graph.indices, "weights": graph.weights}
+    if graph.coords is not None:
+        arrays["coords"] = graph.coords
+    if graph.names is not None:
+        names = graph.names if isinstance(graph.names, NameIndex) else NameIndex.from_names(graph.names.tolist())
+        arrays.update(name_data=names.data, name_offsets=names.offsets, name_order=names.order)
+
+    # Lay the arrays out after a header of fixed size for this set of arrays
+    header = {name: {"dtype": array.dtype.str, "shape": list(array.shape), "offset": 0}
+              for name, array in arrays.items()}
+    start = len(GRAPH_MAGIC) + 8 + len(json.dumps(header)) + 20 * len(arrays)  # Room for the offsets' digits
+    offset = -(-start // ALIGNMENT) * ALIGNMENT
+    for name, array in arrays.items():
+        header[name]["offset"] = offset
+        offset = -(-(offset + array.nbytes) // ALIGNMENT) * ALIGNMENT
+    header_bytes = json.dumps(header).encode("utf-8")
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(GRAPH_MAGIC)
+        f.write(len(header_bytes).to_bytes(8, "little"))
+        f.write(header_bytes)
+        for name, array in arrays.items():
+            f.seek(header[name]["offset"])
+            f.write(np.ascontiguousarray(array).tobytes())
+        f.truncate(offset)
+    os.replace(tmp_path, path)
+
+def open_graph(path):
+    """
+    Opens a file written by save_graph() as a CSRGraph over read-only memory maps.
+    Every search that takes a CSRGraph runs on it directly.
+    """
+    with open(path, "rb") as f:
+        if f.read(len(GRAPH_MAGIC)) != GRAPH_MAGIC:
+            raise ValueError(f"{path} is not a graph file")
+        header = json.loads(f.read(int.from_bytes(f.read(8), "little")))
+
+    def array(name):
+        spec = header.get(name)
+        if spec is None:
+            return None
+        if 0 in spec["shape"]:
+            return np.empty(spec["shape"], dtype=spec["dtype"])  # Nothing to map
+        return np.memmap(path, dtype=spec["dtype"], mode="r", offset=spec["offset"], shape=tuple(spec["shape"]))
+
+    names = None
+    if "name_data" in header:
+        names = NameIndex(array("name_data"), array("name_offsets"), array("name_order"))
+    return CSRGraph(array("indptr"), array("indices"), array("weights"), names, array("coords"))
+
+
+# Example usage
+if __name__ == "__main__":
+    graph = CSRGraph.from_dict({'A': ['B', 'C'], 'B': {'C': 2.5}, 'C': []})
+    print(graph.indptr, graph.indices, graph.weights)  # [0 2 3 3] [1 2 2] [1.  1.  2.5]
+    print(graph.name(graph.neighbors(graph.id('A'))))  # ['B' 'C']
+    print(graph.reverse().neighbors(graph.id('C')))  # [0 1]
+
+    import tempfile
+    path = os.path.join(tempfile.gettempdir(), "example.graph")
+    save_graph(path, graph)
+    mapped = open_graph(path)  # Arrays are paged in from the file as they are used
+    print(mapped.name(mapped.neighbors(mapped.id('A'))))  # ['B' 'C']
+    del mapped
+    os.remove(path)
@@ -0,0 +1,142 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from tree import MCTSArrayTree, toy_children, toy_reward
+
+# Parallel Monte Carlo Tree Search
+# ------------------------------------------
+# mcts() and MCTSArrayTree.run() stay sequential; parallel_mcts() spreads the
+# simulations over several workers with one of two strategies:
+#
+#   "root": every worker process grows its own tree from the same root state and
+#           the root children's visit counts are summed at the end. No sharing,
+#           so it scales with the number of cores.
+#   "tree": threads share one MCTSArrayTree. A thread that walks down a path adds
+#           a virtual loss (extra visits without wins) to it, so the next thread's
+#           UCB prefers other branches. Simulations run outside the tree lock,
+#           which pays off when simulate releases the GIL (numpy, native code).
+#
+# expand and simulate must be module-level functions for "root", since they are
+# pickled to the worker processes.
+
+def _root_worker(root_state, expand, simulate, num_simulations, exploration_constant, seed):
+    """
+    Worker task for root parallelism: grow one independent tree.
+
+    Returns:
+        tuple: (child states, visits, wins) of the root's children.
+    """
+    np.random.seed(seed)  # Different random playouts in every worker
+    tree = MCTSArrayTree(root_state, expand, simulate)
+    tree.run(num_simulations, exploration_constant)
+    children = tree.children(tree.root)
+    return [tree.states[i] for i in children.tolist()], tree.visits[children], tree.wins[children]
+
+def root_parallel_mcts(root_state, num_simulations, workers, expand, simulate, exploration_constant):
+    """
+    Root parallelism: independent trees in worker processes, merged at the root.
+    """
+    counts = [num_simulations // workers + (i < num_simulations % workers) for i in range(workers)]
+    with ProcessPoolExecutor(workers) as executor:
+        futures = [executor.submit(_root_worker, root_state, expand, simulate, count,
+                                   exploration_constant, seed)
+                   for seed, count in enumerate(counts) if count]
+        results = [future.result() for future in futures]
+    if not results:
+        return [], np.zeros(0, dtype=np.int64), np.zeros(0)  # No simulations: the root is never expanded
+
+    # expand() is deterministic, so every tree lists the root children in the same order
+    states = results[0][0]
+    visits = np.zeros(len(states), dtype=np.int64)
+    wins = np.zeros(len(states))
+    for child_states, child_visits, child_wins in results:
+        if child_states != states:
+            raise ValueError("workers expanded the root differently; expand must be deterministic")
+        visits += child_visits
+        wins += child_wins
+    return states, visits, wins
+
+def tree_parallel_mcts(root_state, num_simulations, workers, expand, simulate, exploration_constant,
+                       virtual_loss=1):
+    """
+    Tree parallelism: threads share one tree, spread apart by virtual loss.
+    """
+    tree = MCTSArrayTree(root_state, expand, simulate)
+    lock = threading.Lock()
+    remaining = [num_simulations]
+
+    def simulate_loop():
+        while True:
+            with lock:
+                if remaining[0] == 0:
+                    return
+                remaining[0] -= 1
+
+                # Selection and expansion, as in MCTSArrayTree.run()
+                node = tree.root
+                path = [node]
+                while tree.child_count[node]:
+                    node = tree.select_child(node, exploration_constant)
+                    path.append(node)
+                if tree.visits[node] > 0 or node == tree.root:
+                    states = expand(tree.states[node])
+                    if states:
+                        tree.add_children(node, states)
+                        node = int(tree.first_child[node])
+                        path.append(node)
+                tree.visits[path] += virtual_loss  # Count as visited, with no wins yet
+                state = tree.states[node]
+
+            result = simulate(state)
+
+            with lock:
+                tree.visits[path] += 1 - virtual_loss  # Swap the virtual loss for the real result
+                tree.wins[path] += result
+
+    with ThreadPoolExecutor(workers) as executor:
+        for future in [executor.submit(simulate_loop) for _ in range(workers)]:
+            future.result()
+    children = tree.children(tree.root)
+    return [tree.states[i] for i in children.tolist()], tree.visits[children], tree.wins[children]
+
+def parallel_mcts(root_state, num_simulations, workers=None, mode="root", expand=toy_children,
+                  simulate=toy_reward, exploration_constant=1.4, virtual_loss=1):
+    """
+    Runs MCTS simulations in parallel and returns the statistics of the root's children.
+
+    Args:
+        root_state: The game state at the root.
+        num_simulations (int): Total number of simulations over all workers.
+        workers (int): Number of processes or threads (defaults to the CPU count).
+        mode (str): "root" for independent trees in processes, "tree" for one
+            shared tree across threads.
+        expand (callable): expand(state) -> list of child states, as in MCTSArrayTree.
+        simulate (callable): simulate(state) -> simulation result.
+        exploration_constant (float): The UCB exploration constant.
+        virtual_loss (int): Visits added to a path while a thread simulates it ("tree" only).
+
+    Returns:
+        tuple: (states, visits, wins) of the root's children; the move to play
+        is the state with the most visits. All three are empty for 0 simulations.
+    """
+    workers = workers or os.cpu_count() or 1
+    if num_simulations < 0:
+        raise ValueError("num_simulations must not be negative")
+    if mode == "root":
+        return root_parallel_mcts(root_state, num_simulations, workers, expand, simulate,
+                                  exploration_constant)
+    if mode == "tree":
+        return tree_parallel_mcts(root_state, num_simulations, workers, expand, simulate,
+                                  exploration_constant, virtual_loss)
+    raise ValueError(f"unknown mode {mode!r}")
+
+
+# Example usage
+if __name__ == "__main__":
+    for mode in ("root", "tree"):
+        states, visits, wins = parallel_mcts('A', 4000, workers=4, mode=mode)
+        print(mode, dict(zip(states, visits.tolist())))
+        print("Best child node:", states[int(np.argmax(visits))])
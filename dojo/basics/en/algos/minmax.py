@@ -1,10 +1,158 @@
 import math
+import multiprocessing
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 
 # Constants for representing players and empty cells
 EMPTY = "-"
 PLAYER_X = "X"
 PLAYER_O = "O"
 
+# Bitboard representation
+# ------------------------------------------
+# A board can also be held as two 9-bit integers, one per player, where bit i
+# is set when the player occupies square i (row-major, same order as the list).
+Bitboard = namedtuple("Bitboard", ["x", "o"])
+
+FULL_MASK = (1 << 9) - 1  # All nine squares occupied
+
+# Square indices of the 8 winning lines, and the same lines as bitmasks
+WIN_LINES = (
+    (0, 1, 2), (3, 4, 5), (6, 7, 8),  # Rows
+    (0, 3, 6), (1, 4, 7), (2, 5, 8),  # Columns
+    (0, 4, 8), (2, 4, 6)              # Diagonals
+)
+WIN_MASKS = tuple(sum(1 << i for i in line) for line in WIN_LINES)
+
+# IS_WIN[bits] is True when the occupied squares in bits contain a winning line
+IS_WIN = tuple(any(bits & mask == mask for mask in WIN_MASKS) for bits in range(1 << 9))
+
+# Board symmetries
+# ------------------------------------------
+# The 8 rotations and reflections of the board (the dihedral group) as square
+# permutations: the transformed board holds board[perm[i]] at square i.
+SYMMETRIES = tuple(
+    tuple(3 * sr + sc for sr, sc in (source(r, c) for r, c in (divmod(i, 3) for i in range(9))))
+    for source in (
+        lambda r, c: (r, c),          # Identity
+        lambda r, c: (2 - c, r),      # Rotate 90
+        lambda r, c: (2 - r, 2 - c),  # Rotate 180
+        lambda r, c: (c, 2 - r),      # Rotate 270
+        lambda r, c: (r, 2 - c),      # Mirror left-right
+        lambda r, c: (2 - r, c),      # Mirror top-bottom
+        lambda r, c: (c, r),          # Main diagonal
+        lambda r, c: (2 - c, 2 - r)   # Anti-diagonal
+    )
+)
+
+# SYMMETRY_TABLES[t][bits] is the 9-bit mask bits moved by symmetry t
+SYMMETRY_TABLES = tuple(
+    tuple(sum(1 << i for i in range(9) if bits >> perm[i] & 1) for bits in range(1 << 9))
+    for perm in SYMMETRIES
+)
+
+# TERNARY[bits] is the base-3 value with a 1 digit on every set square, so a board
+# encodes as TERNARY[x] + 2 * TERNARY[o] (0 empty, 1 X, 2 O per square)
+TERNARY = tuple(sum(3 ** i for i in range(9) if bits >> i & 1) for bits in range(1 << 9))
+
+def canonical(x, o):
+    """
+    Find the canonical form of a board under the 8 symmetries.
+
+    Returns:
+        tuple: (code, t) where code is the smallest base-3 code of any transformed
+        board and t the index of the symmetry producing it. A square c of the
+        canonical board is square SYMMETRIES[t][c] of the original board.
+    """
+    best_code, best_t = TERNARY[x] + 2 * TERNARY[o], 0
+    for t in range(1, 8):
+        table = SYMMETRY_TABLES[t]
+        code = TERNARY[table[x]] + 2 * TERNARY[table[o]]
+        if code < best_code:
+            best_code, best_t = code, t
+    return best_code, best_t
+
+# Search statistics
+# ------------------------------------------
+class SearchStats:
+    """
+    Opt-in counters for one get_best_move() call.
+
+    Pass an instance as stats= and read it afterwards. get_best_move() resets
+    it at the start of each call. A ParallelSearch only records elapsed time,
+    since the nodes are visited in the worker processes.
+    """
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.nodes = 0  # Positions visited
+        self.cutoffs = 0  # Alpha-beta cutoffs
+        self.tt_hits = 0  # Transposition table probes that returned a score
+        self.max_depth = 0  # Deepest depth reached below the root
+        self.elapsed = 0.0  # Seconds spent in get_best_move()
+
+    @property
+    def nodes_per_sec(self):
+        return self.nodes / self.elapsed if self.elapsed > 0 else 0.0
+
+    def as_dict(self):
+        return {
+            "nodes": self.nodes,
+            "cutoffs": self.cutoffs,
+            "tt_hits": self.tt_hits,
+            "max_depth": self.max_depth,
+            "elapsed": self.elapsed,
+            "nodes_per_sec": self.nodes_per_sec
+        }
+
+# Transposition table
+# ------------------------------------------
+EXACT = 0  # Score is the exact minmax value
+LOWER = 1  # Score is a lower bound (the search failed high)
+UPPER = 2  # Score is an upper bound (the search failed low)
+
+class TranspositionTable:
+    """
+    Bounded cache of search results keyed on the canonical board and side to move.
+
+    Entries hold (score, depth, bound). Scores in this game depend on the depth
+    they were searched at, so an entry only answers probes at the same depth.
+    The least recently used entry is evicted once maxsize is reached. The table
+    is kept between get_best_move() calls until the caller clears it.
+    """
+    def __init__(self, maxsize=1 << 16):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        """
+        Return the (score, depth, bound) entry for key, or None.
+        """
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, score, depth, bound):
+        """
+        Store an entry, evicting the least recently used one when full.
+        """
+        self.entries[key] = (score, depth, bound)
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Drop every entry.
+        """
+        self.entries.clear()
+
 def evaluate(board):
     """
     Evaluate the current state of the board.
@@ -32,10 +180,127 @@ def evaluate(board):
     # No winner, it's a tie
     return 0
 
-def minmax(board, depth, is_maximizing):
+def to_bitboard(board):
+    """
+    Convert a list board into a Bitboard.
+    """
+    x = o = 0
+    for i, cell in enumerate(board):
+        if cell == PLAYER_X:
+            x |= 1 << i
+        elif cell == PLAYER_O:
+            o |= 1 << i
+    return Bitboard(x, o)
+
+def from_bitboard(board):
+    """
+    Convert a Bitboard back into a list board.
+    """
+    return [PLAYER_X if board.x >> i & 1 else PLAYER_O if board.o >> i & 1 else EMPTY
+            for i in range(9)]
+
+def evaluate_bitboard(board):
+    """
+    Evaluate a Bitboard with the same scoring as evaluate().
+    Return +1 if the computer wins, -1 if the player wins, or 0 for a tie.
+    """
+    if IS_WIN[board.x]:
+        return 1
+    if IS_WIN[board.o]:
+        return -1
+    return 0
+
+def minmax_bitboard(x, o, depth, is_maximizing, alpha=-math.inf, beta=math.inf, tt=None, stats=None):
+    """
+    MinMax with alpha-beta pruning over the two player bitmasks.
+
+    With the default full window it returns the same score as minmax() on the
+    equivalent list board. Otherwise the result is fail-soft: a score <= alpha
+    is an upper bound and a score >= beta a lower bound. Results are cached in
+    tt when given, and counted in stats when given.
+    """
+    if stats is not None:
+        stats.nodes += 1
+        if depth > stats.max_depth:
+            stats.max_depth = depth
+
+    # Base cases
+    if IS_WIN[x]:
+        return 1 - depth
+    if IS_WIN[o]:
+        return -1 + depth
+    empty = FULL_MASK ^ (x | o)
+    if not empty:
+        return 0
+
+    if tt is not None:
+        key = (canonical(x, o)[0], is_maximizing)
+        entry = tt.get(key)
+        if entry is not None and entry[1] == depth:
+            score, _, bound = entry
+            if bound == EXACT or (bound == LOWER and score >= beta) or (bound == UPPER and score <= alpha):
+                if stats is not None:
+                    stats.tt_hits += 1
+                return score
+        alpha_orig, beta_orig = alpha, beta
+
+    # Moves are generated lowest square first by isolating the lowest set bit,
+    # so the search order matches the list version.
+    if is_maximizing:
+        best_score = -math.inf
+        while empty:
+            bit = empty & -empty
+            empty ^= bit
+            score = minmax_bitboard(x | bit, o, depth + 1, False, alpha, beta, tt, stats)
+            if score > best_score:
+                best_score = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        if stats is not None:
+                            stats.cutoffs += 1
+                        break
+    else:
+        best_score = math.inf
+        while empty:
+            bit = empty & -empty
+            empty ^= bit
+            score = minmax_bitboard(x, o | bit, depth + 1, True, alpha, beta, tt, stats)
+            if score < best_score:
+                best_score = score
+                if score < beta:
+                    beta = score
+                    if alpha >= beta:
+                        if stats is not None:
+                            stats.cutoffs += 1
+                        break
+
+    if tt is not None:
+        if best_score <= alpha_orig:
+            bound = UPPER
+        elif best_score >= beta_orig:
+            bound = LOWER
+        else:
+            bound = EXACT
+        tt.put(key, best_score, depth, bound)
+    return best_score
+
+def minmax(board, depth, is_maximizing, tt=None, stats=None):
     """
     MinMax algorithm implementation.
+    Accepts either a list board or a Bitboard. Passing a TranspositionTable
+    runs the bitboard search with alpha-beta pruning and caching.
     """
+    if tt is not None and not isinstance(board, Bitboard):
+        board = to_bitboard(board)
+    if isinstance(board, Bitboard):
+        return minmax_bitboard(board.x, board.o, depth, is_maximizing, tt=tt, stats=stats)
+
+    if stats is not None:
+        stats.nodes += 1
+        if depth > stats.max_depth:
+            stats.max_depth = depth
+
     score = evaluate(board)
 
     # Base cases
@@ -51,7 +316,7 @@ def minmax(board, depth, is_maximizing):
         for i in range(len(board)):
             if board[i] == EMPTY:
                 board[i] = PLAYER_X
-                score = minmax(board, depth + 1, False)
+                score = minmax(board, depth + 1, False, stats=stats)
                 board[i] = EMPTY
                 best_score = max(score, best_score)
         return best_score
@@ -60,21 +325,190 @@ def minmax(board, depth, is_maximizing):
         for i in range(len(board)):
             if board[i] == EMPTY:
                 board[i] = PLAYER_O
-                score = minmax(board, depth + 1, True)
+                score = minmax(board, depth + 1, True, stats=stats)
                 board[i] = EMPTY
                 best_score = min(score, best_score)
         return best_score
 
-def get_best_move(board):
+def best_move_and_score(board, tt=None, stats=None):
+    """
+    Search every move for the computer on a Bitboard.
+
+    Returns:
+        tuple: (move, score) for the lowest square with the best score, or
+        (None, -math.inf) when the board is full.
+    """
+    best_score = -math.inf
+    best_move = None
+    empty = FULL_MASK ^ (board.x | board.o)
+    while empty:
+        bit = empty & -empty
+        empty ^= bit
+        # Searching with alpha = best score so far only proves that a worse
+        # move is worse; a move that ties or beats it still gets its exact score.
+        score = minmax_bitboard(board.x | bit, board.o, 0, False, best_score, math.inf, tt, stats)
+        if score > best_score:
+            best_score = score
+            best_move = bit.bit_length() - 1
+    return best_move, best_score
+
+# Parallel root splitting
+# ------------------------------------------
+# Worker processes search independent subtrees below the root. The parent
+# publishes the best exact root score found so far through a shared double;
+# each worker reads it when a task starts and uses it as its alpha bound.
+_shared_alpha = None  # multiprocessing.Value, set in each worker
+_worker_tt = None  # Per-worker TranspositionTable, kept across tasks
+
+def _init_worker(shared_alpha):
+    global _shared_alpha, _worker_tt
+    _shared_alpha = shared_alpha
+    _worker_tt = TranspositionTable()
+
+def _search_subtree(x, o, depth, is_maximizing):
+    """
+    Worker task: search one subtree below the root.
+
+    The window starts one below the shared best score, so a subtree that could
+    tie the best root move still gets its exact score (scores are integers).
+
+    Returns:
+        tuple: (score, alpha) where score <= alpha means only an upper bound.
+    """
+    alpha = _shared_alpha.value - 1
+    return minmax_bitboard(x, o, depth, is_maximizing, alpha, math.inf, _worker_tt), alpha
+
+class ParallelSearch:
+    """
+    Process pool that splits get_best_move() across root moves.
+
+    With split_depth=1 each root move is one task; with split_depth=2 each reply
+    to each root move is one task, which gives more even work when there are
+    few root moves. The chosen move is always the one the serial search picks.
+    One search runs at a time per ParallelSearch.
+    """
+    def __init__(self, max_workers=None, split_depth=1):
+        if split_depth not in (1, 2):
+            raise ValueError("split_depth must be 1 or 2")
+        self.split_depth = split_depth
+        self.alpha = multiprocessing.Value("d", -math.inf)
+        self.executor = ProcessPoolExecutor(max_workers, initializer=_init_worker,
+                                            initargs=(self.alpha,))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.executor.shutdown()
+
+    def best_move_and_score(self, board):
+        """
+        Same result as best_move_and_score(board) for a Bitboard, searched in parallel.
+        """
+        x, o = board
+        self.alpha.value = -math.inf
+
+        # Submit one task per subtree; scores[move] collects exact child scores
+        # and pending[move] counts the replies still out for split_depth=2.
+        scores = {}
+        pending = {}
+        futures = {}
+        empty = FULL_MASK ^ (x | o)
+        while empty:
+            bit = empty & -empty
+            empty ^= bit
+            move = bit.bit_length() - 1
+            child_x = x | bit
+            replies = FULL_MASK ^ (child_x | o)
+            if IS_WIN[child_x] or IS_WIN[o] or not replies:
+                # Terminal children are cheap; score them here
+                scores[move] = minmax_bitboard(child_x, o, 0, False)
+                continue
+            if self.split_depth == 1:
+                futures[self.executor.submit(_search_subtree, child_x, o, 0, False)] = move
+                continue
+            scores[move] = math.inf
+            pending[move] = 0
+            while replies:
+                reply = replies & -replies
+                replies ^= reply
+                futures[self.executor.submit(_search_subtree, child_x, o | reply, 1, True)] = move
+                pending[move] += 1
+
+        failed_low = set()  # Moves proven worse than some exact score
+        best_score = max((score for move, score in scores.items() if move not in pending),
+                         default=-math.inf)
+        self.alpha.value = best_score
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                move = futures.pop(future)
+                score, alpha = future.result()
+                if score <= alpha:
+                    failed_low.add(move)
+                if move in pending:
+                    scores[move] = min(scores[move], score)
+                    pending[move] -= 1
+                    if pending[move]:
+                        continue
+                    del pending[move]
+                else:
+                    scores[move] = score
+                if move not in failed_low and scores[move] > best_score:
+                    best_score = scores[move]
+                    self.alpha.value = best_score
+
+        # Lowest square among the exact best scores, as in the serial search
+        best_move = None
+        for move in sorted(scores):
+            if move not in failed_low and scores[move] == best_score:
+                best_move = move
+                break
+        return best_move, best_score
+
+def get_best_move(board, tt=None, tablebase=None, parallel=None, stats=None):
     """
     Get the best move for the computer using the MinMax algorithm.
+    Accepts either a list board or a Bitboard, and returns the square index.
+
+    Passing a TranspositionTable reuses positions already searched, including
+    their rotations and reflections. The table is left filled for the next call;
+    call tt.clear() to start cold.
+
+    Passing an open Tablebase (see tablebase.py) answers from the precomputed
+    solution without searching. Passing a ParallelSearch splits the search
+    across its worker processes. Passing a SearchStats records what the
+    search did.
     """
+    if stats is None:
+        return _get_best_move(board, tt, tablebase, parallel, None)
+    stats.reset()
+    start = time.perf_counter()
+    try:
+        return _get_best_move(board, tt, tablebase, parallel, stats)
+    finally:
+        stats.elapsed = time.perf_counter() - start
+
+def _get_best_move(board, tt, tablebase, parallel, stats):
+    if tablebase is not None:
+        return tablebase.lookup(board)[0]
+    if parallel is not None:
+        if not isinstance(board, Bitboard):
+            board = to_bitboard(board)
+        return parallel.best_move_and_score(board)[0]
+    if tt is not None and not isinstance(board, Bitboard):
+        board = to_bitboard(board)
+    if isinstance(board, Bitboard):
+        return best_move_and_score(board, tt, stats)[0]
     best_score = -math.inf
     best_move = None
     for i in range(len(board)):
         if board[i] == EMPTY:
             board[i] = PLAYER_X
-            score = minmax(board, 0, False)
+            score = minmax(board, 0, False, stats=stats)
             board[i] = EMPTY
             if score > best_score:
                 best_score = score
@@ -82,13 +516,31 @@ def get_best_move(board):
     return best_move
 
 # Example usage
-board = [EMPTY, EMPTY, EMPTY,
-         EMPTY, EMPTY, EMPTY,
-         EMPTY, EMPTY, EMPTY]
+if __name__ == "__main__":
+    board = [EMPTY, EMPTY, EMPTY,
+             EMPTY, EMPTY, EMPTY,
+             EMPTY, EMPTY, EMPTY]
+
+    # Computer's turn (player X)
+    best_move = get_best_move(board)
+    board[best_move] = PLAYER_X
+
+    # Print the updated board
+    print(board)
+
+    # The same search on the bitboard representation picks the same square
+    print(get_best_move(Bitboard(0, 0)))  # Output: 4
+
+    # A transposition table shares work between symmetric positions and later calls
+    tt = TranspositionTable()
+    print(get_best_move(Bitboard(0, 0), tt))  # Output: 4
+    print(len(tt))  # Number of canonical positions cached
 
-# Computer's turn (player X)
-best_move = get_best_move(board)
-board[best_move] = PLAYER_X
+    # Opt-in statistics for one call
+    stats = SearchStats()
+    get_best_move(Bitboard(0, 0), TranspositionTable(), stats=stats)
+    print(stats.as_dict())
 
-# Print the updated board
-print(board)
+    # Root moves searched by worker processes, same move as the serial search
+    with ParallelSearch(max_workers=4) as parallel:
+        print(get_best_move(Bitboard(0, 0), parallel=parallel))  # Output: 4
@@ -0,0 +1,124 @@
+"""
+Benchmark for the tic-tac-toe minmax engine.
+
+Replays a fixed corpus of opening, midgame and endgame boards through each
+engine variant and writes the per-board search statistics as JSON, so runs of
+different variants or revisions can be compared. Run from this directory:
+
+    python minmax_bench.py --output minmax_bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import tempfile
+import time
+
+from minmax import SearchStats, TranspositionTable, get_best_move, to_bitboard
+from tablebase import Tablebase, build_tablebase
+
+# Benchmark corpus
+# ------------------------------------------
+# Boards are written as 9-character strings, row-major, with X (the computer)
+# to move; in boards with one more O than X, O made the first move.
+CORPUS = {
+    "opening": [
+        "---------",
+        "----O----",
+        "O--------",
+        "-O-------",
+    ],
+    "midgame": [
+        "X---O---O",
+        "O-X-X---O",
+        "XO--O----",
+        "X-O-O-X--",
+    ],
+    "endgame": [
+        "XOX-O-O-X",
+        "XOXOO-X--",
+        "OX-XO-O-X",
+        "XXO-OO-X-",
+    ],
+}
+
+def run_variant(variant, board, tablebase=None):
+    """
+    Run one get_best_move() call for a variant.
+
+    Returns:
+        tuple: (move, SearchStats)
+    """
+    stats = SearchStats()
+    if variant == "list":
+        move = get_best_move(list(board), stats=stats)
+    elif variant == "bitboard":
+        move = get_best_move(to_bitboard(board), stats=stats)
+    elif variant == "bitboard_tt":
+        move = get_best_move(to_bitboard(board), TranspositionTable(), stats=stats)
+    elif variant == "tablebase":
+        move = get_best_move(board, tablebase=tablebase, stats=stats)
+    else:
+        raise ValueError(f"unknown variant {variant!r}")
+    return move, stats
+
+def run_benchmark(variants, repeat=3):
+    """
+    Replay the corpus through each variant.
+
+    Each board is searched repeat times; the fastest run is kept.
+
+    Returns:
+        dict: JSON-ready results with per-board records and per-variant totals.
+    """
+    results = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "repeat": repeat,
+        "records": [],
+        "totals": {},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        tablebase = None
+        if "tablebase" in variants:
+            path = os.path.join(tmp, "tictactoe.tb")
+            build_tablebase(path)
+            tablebase = Tablebase(path)
+        try:
+            for variant in variants:
+                nodes = elapsed = 0
+                for phase, boards in CORPUS.items():
+                    for board in boards:
+                        runs = [run_variant(variant, board, tablebase) for _ in range(repeat)]
+                        move, stats = min(runs, key=lambda run: run[1].elapsed)
+                        results["records"].append(
+                            {"variant": variant, "phase": phase, "board": board, "move": move, **stats.as_dict()}
+                        )
+                        nodes += stats.nodes
+                        elapsed += stats.elapsed
+                results["totals"][variant] = {
+                    "nodes": nodes,
+                    "elapsed": elapsed,
+                    "nodes_per_sec": nodes / elapsed if elapsed > 0 else 0.0,
+                }
+        finally:
+            if tablebase is not None:
+                tablebase.close()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--output", default="minmax_bench.json", help="JSON results file")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per board; the fastest is kept")
+    parser.add_argument("--variants", nargs="+", default=["list", "bitboard", "bitboard_tt", "tablebase"],
+                        choices=["list", "bitboard", "bitboard_tt", "tablebase"])
+    args = parser.parse_args()
+
+    results = run_benchmark(args.variants, args.repeat)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    for variant, totals in results["totals"].items():
+        print(f"{variant:12s} {totals['nodes']:10d} nodes {totals['elapsed']:9.4f} s "
+              f"{totals['nodes_per_sec']:12.0f} nodes/s")
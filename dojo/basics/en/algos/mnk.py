@@ -0,0 +1,274 @@
+import math
+import time
+from collections import namedtuple
+
+# m,n,k-games
+# ------------------------------------------
+# Tic-tac-toe generalised to an m-row by n-column board where k in a row wins:
+# 3,3,3 is tic-tac-toe, 15,15,5 is gomoku. Each player's stones are one integer
+# bitmask with bit r * n + c set for the stone at row r, column c.
+
+WIN_SCORE = 10 ** 9  # Score of a win at the root; wins further away score less
+
+SearchResult = namedtuple("SearchResult", ["move", "score", "depth"])
+
+class SearchTimeout(Exception):
+    """
+    Raised inside the search when the wall-clock budget runs out.
+    """
+
+class MNKGame:
+    """
+    Board geometry for an m,n,k-game with precomputed line masks.
+    """
+    def __init__(self, m, n, k):
+        if k > max(m, n):
+            raise ValueError("k must fit on the board")
+        self.m, self.n, self.k = m, n, k
+        self.size = m * n
+        self.full = (1 << self.size) - 1
+
+        # Every run of k squares along a row, column or diagonal
+        lines = []
+        for r in range(m):
+            for c in range(n):
+                for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_r, end_c = r + dr * (k - 1), c + dc * (k - 1)
+                    if 0 <= end_r < m and 0 <= end_c < n:
+                        lines.append(sum(1 << ((r + dr * i) * n + c + dc * i) for i in range(k)))
+        self.lines = tuple(lines)
+        self.lines_through = tuple(
+            tuple(line for line in self.lines if line >> sq & 1) for sq in range(self.size)
+        )
+
+        # Column masks that stop horizontal shifts from wrapping to the next row
+        first_col = sum(1 << (r * n) for r in range(m))
+        self.not_first_col = self.full ^ first_col
+        self.not_last_col = self.full ^ (first_col << (n - 1))
+
+    def parse(self, text):
+        """
+        Read a board from rows of 'X', 'O' and '.' characters.
+
+        Returns:
+            tuple: (x, o) bitmasks.
+        """
+        rows = text.split()
+        x = o = 0
+        for r, row in enumerate(rows):
+            for c, cell in enumerate(row):
+                if cell == "X":
+                    x |= 1 << (r * self.n + c)
+                elif cell == "O":
+                    o |= 1 << (r * self.n + c)
+        return x, o
+
+    def is_win(self, stones, sq):
+        """
+        Check whether the stone just placed on sq completes a line.
+        """
+        for line in self.lines_through[sq]:
+            if stones & line == line:
+                return True
+        return False
+
+    def neighbours(self, bits):
+        """
+        Squares within one step (including diagonals) of any square in bits.
+        """
+        n = self.n
+        horizontal = bits | (bits << 1 & self.not_first_col) | (bits >> 1 & self.not_last_col)
+        return (horizontal | horizontal << n | horizontal >> n) & self.full
+
+    def candidates(self, occupied):
+        """
+        Empty squares worth searching. Small boards use every empty square;
+        larger ones only squares within two steps of a stone.
+        """
+        empty = self.full ^ occupied
+        if self.size <= 25:
+            return empty
+        if not occupied:
+            return 1 << (self.m // 2 * self.n + self.n // 2)  # Open in the centre
+        return self.neighbours(self.neighbours(occupied)) & empty
+
+    def evaluate(self, me, opp):
+        """
+        Heuristic score from the side to move's point of view: lines still open
+        to one player count for them, weighted by how many stones they hold.
+        """
+        score = 0
+        for line in self.lines:
+            mine = me & line
+            theirs = opp & line
+            if mine and not theirs:
+                score += 4 ** mine.bit_count()
+            elif theirs and not mine:
+                score -= 4 ** theirs.bit_count()
+        return score
+
+def bits_to_squares(bits):
+    """
+    List the square indices of the set bits, lowest first.
+    """
+    squares = []
+    while bits:
+        bit = bits & -bits
+        bits ^= bit
+        squares.append(bit.bit_length() - 1)
+    return squares
+
+class Searcher:
+    """
+    Alpha-beta (negamax) search with killer and history move ordering,
+    run by iterative deepening under a wall-clock budget.
+    """
+    def __init__(self, game):
+        self.game = game
+        self.history = [0] * game.size  # Cutoffs per square, weighted by depth
+        self.killers = []  # Two quiet moves per ply that recently caused a cutoff
+        self.nodes = 0
+        self.deadline = math.inf
+        # Check the clock about every 4096 line scans: evaluate() scans every
+        # line, so larger boards check after fewer nodes (every 4 on 15x15)
+        self.check_mask = (1 << max(0, (4096 // len(game.lines)).bit_length() - 1)) - 1
+
+    def order(self, moves, ply):
+        """
+        Sort moves so killers for this ply come first, then by history score.
+        """
+        moves.sort(key=self.history.__getitem__, reverse=True)
+        if ply < len(self.killers):
+            for killer in reversed(self.killers[ply]):
+                if killer in moves:
+                    moves.remove(killer)
+                    moves.insert(0, killer)
+        return moves
+
+    def record_cutoff(self, sq, depth, ply):
+        """
+        Remember a move that caused a beta cutoff.
+        """
+        self.history[sq] += depth * depth
+        while len(self.killers) <= ply:
+            self.killers.append([])
+        killers = self.killers[ply]
+        if sq not in killers:
+            killers.insert(0, sq)
+            del killers[2:]
+
+    def negamax(self, me, opp, depth, alpha, beta, ply):
+        """
+        Score the position for the side to move (me); the opponent moved last.
+        """
+        self.nodes += 1
+        if self.nodes & self.check_mask == 0 and time.monotonic() > self.deadline:
+            raise SearchTimeout()
+
+        game = self.game
+        occupied = me | opp
+        if occupied == game.full:
+            return 0
+        if depth == 0:
+            return game.evaluate(me, opp)
+
+        best_score = -math.inf
+        for sq in self.order(bits_to_squares(game.candidates(occupied)), ply):
+            stones = me | 1 << sq
+            if game.is_win(stones, sq):
+                score = WIN_SCORE - ply - 1
+            else:
+                score = -self.negamax(opp, stones, depth - 1, -beta, -alpha, ply + 1)
+            if score > best_score:
+                best_score = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        self.record_cutoff(sq, depth, ply)
+                        break
+        return best_score
+
+    def search_root(self, me, opp, depth, first_move, best):
+        """
+        Search every root move to the given depth, trying first_move first.
+        best is updated in place with [move, score] as moves complete, so a
+        timeout part-way through keeps the best fully searched move.
+        """
+        moves = self.order(bits_to_squares(self.game.candidates(me | opp)), 0)
+        if first_move in moves:
+            moves.remove(first_move)
+            moves.insert(0, first_move)
+        alpha = -math.inf
+        for sq in moves:
+            stones = me | 1 << sq
+            if self.game.is_win(stones, sq):
+                score = WIN_SCORE
+            else:
+                score = -self.negamax(opp, stones, depth - 1, -math.inf, -alpha, 1)
+            if score > alpha:
+                alpha = score
+                best[:] = [sq, score]
+
+    def search(self, me, opp, time_budget=1.0, max_depth=None):
+        """
+        Iterative deepening from depth 1 until the time budget or max_depth.
+
+        Args:
+            me (int): Stones of the side to move.
+            opp (int): Stones of the other side.
+            time_budget (float): Seconds of wall-clock time to spend.
+            max_depth (int): Optional depth limit (defaults to the empty squares).
+
+        Returns:
+            SearchResult: The best move found, its score and the last depth
+            that was completed. move is None if the board is full.
+        """
+        game = self.game
+        empties = game.size - (me | opp).bit_count()
+        max_depth = empties if max_depth is None else min(max_depth, empties)
+        self.deadline = time.monotonic() + time_budget
+        result = SearchResult(None, 0, 0)
+        for depth in range(1, max_depth + 1):
+            best = [None, -math.inf]
+            try:
+                self.search_root(me, opp, depth, result.move, best)
+            except SearchTimeout:
+                # The previous best move is searched first, so any move kept from
+                # this iteration scored at least as well at the deeper depth.
+                if best[0] is not None:
+                    result = SearchResult(best[0], best[1], result.depth)
+                break
+            result = SearchResult(best[0], best[1], depth)
+            if abs(best[1]) >= WIN_SCORE - game.size:
+                break  # Forced win or loss found; deeper search cannot change it
+        return result
+
+def best_move(game, me, opp, time_budget=1.0, max_depth=None):
+    """
+    Find the best move for the side to move with a fresh Searcher.
+    """
+    return Searcher(game).search(me, opp, time_budget, max_depth)
+
+
+# Example usage
+if __name__ == "__main__":
+    # Tic-tac-toe is solved outright
+    game = MNKGame(3, 3, 3)
+    print(best_move(game, 0, 0))
+
+    # 4x4, four in a row: X must block the top row
+    game = MNKGame(4, 4, 4)
+    x, o = game.parse("""
+        OOO.
+        X...
+        X...
+        X...
+    """)
+    print(best_move(game, x, o, time_budget=1.0))
+
+    # Gomoku on 15x15: X has an open four and wins at once
+    game = MNKGame(15, 15, 5)
+    x, o = game.parse("\n".join(
+        ["." * 15] * 6 + ["....XXXX.......", "....OOO........"] + ["." * 15] * 7
+    ))
+    print(best_move(game, x, o, time_budget=1.0))
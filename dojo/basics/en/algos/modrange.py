@@ -1,52 +1,194 @@
-# Example 1:
-amin = -10
-amax = 10
-b = 3
+import time
 
-# modn will compute -10 mod 3 = 1, and 10 mod 3 = 1.
-print(modn(amin, b))  # Output: 1
-print(modn(amax, b))  # Output: 1
+import numpy as np
 
-# slow_modrange will compute the minimum and maximum of modn(n, 3) for n in range(-10, 11)
-# The resulting set of values are [0, 1, 2, 0, 1, 2, ...], hence the min is 0 and the max is 2.
-print(slow_modrange(amin, amax, b))  # Output: (0, 2)
+# n mod b over an interval
+# ------------------------------------------
+def modn(n, b):
+    """
+    Computes n mod b with Python's floored modulo: the result lies in [0, b)
+    for b > 0 and in (b, 0] for b < 0, also for negative n.
 
-# fast_modrange computes the same result, but more efficiently.
-# Since the range crosses zero, the result is the full range of modulus, which is [0, b-1] = [0, 2].
-print(fast_modrange(amin, amax, b))  # Output: (0, 2)
+    Args:
+        n (int): The dividend.
+        b (int): The modulus.
 
+    Returns:
+        int: n mod b.
+    """
+    return n % b
 
-# Example 2:
-amin = 10
-amax = 20
-b = 5
+def slow_modrange(amin, amax, b):
+    """
+    Computes the minimum and maximum of modn(n, b) over n in [amin, amax]
+    by visiting every n.
 
-# modn will compute 10 mod 5 = 0, and 20 mod 5 = 0.
-print(modn(amin, b))  # Output: 0
-print(modn(amax, b))  # Output: 0
+    Args:
+        amin (int): The start of the interval (inclusive).
+        amax (int): The end of the interval (inclusive), amax >= amin.
+        b (int): The modulus.
 
-# slow_modrange will compute the minimum and maximum of modn(n, 5) for n in range(10, 21)
-# The resulting set of values are [0, 1, 2, 3, 4, 0, 1, 2, 3, 4, 0], hence the min is 0 and the max is 4.
-print(slow_modrange(amin, amax, b))  # Output: (0, 4)
+    Returns:
+        tuple: (min, max) of modn(n, b) over the interval.
+    """
+    values = [modn(n, b) for n in range(amin, amax + 1)]
+    return min(values), max(values)
 
-# fast_modrange computes the same result, but more efficiently.
-# Since the range (amax - amin = 10) is wider than the modulus (5), the result is the full range of modulus, which is [0, b-1] = [0, 4].
-print(fast_modrange(amin, amax, b))  # Output: (0, 4)
+def fast_modrange(amin, amax, b):
+    """
+    Computes the same result as slow_modrange in constant time.
 
+    Within one period modn(n, b) rises by one per step, so unless the interval
+    spans a whole period or wraps past a multiple of b, the ends of the interval
+    give the minimum and maximum. Otherwise every residue occurs.
 
-# Example 3:
-amin = 7
-amax = 9
-b = 5
+    Args:
+        amin (int): The start of the interval (inclusive).
+        amax (int): The end of the interval (inclusive), amax >= amin.
+        b (int): The modulus.
 
-# modn will compute 7 mod 5 = 2, and 9 mod 5 = 4.
-print(modn(amin, b))  # Output: 2
-print(modn(amax, b))  # Output: 4
+    Returns:
+        tuple: (min, max) of modn(n, b) over the interval.
+    """
+    full_range = (0, b - 1) if b > 0 else (b + 1, 0)
+    if amax - amin + 1 >= abs(b):  # The interval covers a whole period
+        return full_range
+    lo, hi = modn(amin, b), modn(amax, b)
+    if lo > hi:  # The interval wraps past a multiple of b
+        return full_range
+    return lo, hi
 
-# slow_modrange will compute the minimum and maximum of modn(n, 5) for n in range(7, 10)
-# The resulting set of values are [2, 3, 4], hence the min is 2 and the max is 4.
-print(slow_modrange(amin, amax, b))  # Output: (2, 4)
+# Vectorised modrange
+# ------------------------------------------
+def modrange_array(amin, amax, b):
+    """
+    fast_modrange over arrays of intervals, without Python loops.
 
-# fast_modrange computes the same result, but more efficiently.
-# Since the range (amax - amin = 2) is narrower than the modulus (5), it computes the mod of the range ends and returns them.
-print(fast_modrange(amin, amax, b))  # Output: (2, 4)
+    Args:
+        amin (np.ndarray): Interval starts (inclusive), integer.
+        amax (np.ndarray): Interval ends (inclusive), integer, amax >= amin.
+        b (np.ndarray): Moduli, integer and non-zero. The three arguments
+            broadcast against each other, so b may be a scalar.
+
+    Returns:
+        tuple: (lo, hi) arrays with the min and max of modn(n, b) per interval,
+        in the broadcast shape and a signed dtype that holds all three inputs.
+    """
+    amin, amax, b = np.asarray(amin), np.asarray(amax), np.asarray(b)
+    # A common signed dtype, so amax - amin + lo and b + 1 neither wrap nor need
+    # a downcast in the in-place steps below (int8 lifts unsigned inputs)
+    dtype = np.result_type(amin, amax, b, np.int8)
+    shape = np.broadcast_shapes(amin.shape, amax.shape, b.shape)
+    amin, amax, b = (np.atleast_1d(array.astype(dtype, copy=False)) for array in (amin, amax, b))
+    amin, amax, b = np.broadcast_arrays(amin, amax, b)
+
+    # One modulo per interval: the residue rises by one per step from amin, so
+    # amax's residue is lo + (amax - amin) unless the interval runs past the
+    # top residue, in which case it covers every residue.
+    lo = np.mod(amin, b)
+    hi = np.subtract(amax, amin)
+    hi += lo
+    top = np.maximum(b - 1, 0)  # Largest residue: b - 1 for b > 0, 0 for b < 0
+    full = hi > top
+    np.copyto(hi, top, where=full)
+    np.copyto(lo, np.minimum(b + 1, 0), where=full)  # Smallest residue: 0 or b + 1
+    return lo.reshape(shape), hi.reshape(shape)
+
+def validate_modrange(num_intervals=100_000, seed=0):
+    """
+    Checks modrange_array against slow_modrange on random intervals, including
+    negative values and negative moduli.
+
+    Raises:
+        AssertionError: On the first interval where the two disagree.
+    """
+    rng = np.random.default_rng(seed)
+    amin = rng.integers(-50, 50, num_intervals)
+    amax = amin + rng.integers(0, 30, num_intervals)
+    b = rng.integers(1, 20, num_intervals) * rng.choice([-1, 1], num_intervals)
+    lo, hi = modrange_array(amin, amax, b)
+    for i in range(num_intervals):
+        expected = slow_modrange(int(amin[i]), int(amax[i]), int(b[i]))
+        assert (lo[i], hi[i]) == expected, (amin[i], amax[i], b[i], (lo[i], hi[i]), expected)
+
+def benchmark_modrange(num_intervals=10 ** 7, repeat=3, seed=0):
+    """
+    Times modrange_array on random intervals.
+
+    Returns:
+        float: The best per-interval cost in nanoseconds.
+    """
+    rng = np.random.default_rng(seed)
+    amin = rng.integers(-10 ** 6, 10 ** 6, num_intervals)
+    amax = amin + rng.integers(0, 1000, num_intervals)
+    b = rng.integers(1, 1000, num_intervals)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        modrange_array(amin, amax, b)
+        best = min(best, time.perf_counter() - start)
+    return best / num_intervals * 1e9
+
+
+# Example usage
+if __name__ == "__main__":
+    # Example 1:
+    amin = -10
+    amax = 10
+    b = 3
+
+    # modn will compute -10 mod 3 = 2, and 10 mod 3 = 1.
+    print(modn(amin, b))  # Output: 2
+    print(modn(amax, b))  # Output: 1
+
+    # slow_modrange will compute the minimum and maximum of modn(n, 3) for n in range(-10, 11)
+    # The resulting set of values are [0, 1, 2, 0, 1, 2, ...], hence the min is 0 and the max is 2.
+    print(slow_modrange(amin, amax, b))  # Output: (0, 2)
+
+    # fast_modrange computes the same result, but more efficiently.
+    # Since the range crosses zero, the result is the full range of modulus, which is [0, b-1] = [0, 2].
+    print(fast_modrange(amin, amax, b))  # Output: (0, 2)
+
+
+    # Example 2:
+    amin = 10
+    amax = 20
+    b = 5
+
+    # modn will compute 10 mod 5 = 0, and 20 mod 5 = 0.
+    print(modn(amin, b))  # Output: 0
+    print(modn(amax, b))  # Output: 0
+
+    # slow_modrange will compute the minimum and maximum of modn(n, 5) for n in range(10, 21)
+    # The resulting set of values are [0, 1, 2, 3, 4, 0, 1, 2, 3, 4, 0], hence the min is 0 and the max is 4.
+    print(slow_modrange(amin, amax, b))  # Output: (0, 4)
+
+    # fast_modrange computes the same result, but more efficiently.
+    # Since the range (amax - amin = 10) is wider than the modulus (5), the result is the full range of modulus, which is [0, b-1] = [0, 4].
+    print(fast_modrange(amin, amax, b))  # Output: (0, 4)
+
+
+    # Example 3:
+    amin = 7
+    amax = 9
+    b = 5
+
+    # modn will compute 7 mod 5 = 2, and 9 mod 5 = 4.
+    print(modn(amin, b))  # Output: 2
+    print(modn(amax, b))  # Output: 4
+
+    # slow_modrange will compute the minimum and maximum of modn(n, 5) for n in range(7, 10)
+    # The resulting set of values are [2, 3, 4], hence the min is 2 and the max is 4.
+    print(slow_modrange(amin, amax, b))  # Output: (2, 4)
+
+    # fast_modrange computes the same result, but more efficiently.
+    # Since the range (amax - amin = 2) is narrower than the modulus (5), it computes the mod of the range ends and returns them.
+    print(fast_modrange(amin, amax, b))  # Output: (2, 4)
+
+    # Example 4: many intervals at once
+    lo, hi = modrange_array(np.array([-10, 10, 7]), np.array([10, 20, 9]), np.array([3, 5, 5]))
+    print(lo, hi)  # Output: [0 0 2] [2 4 4]
+
+    # Check against slow_modrange, then time 10^7 intervals
+    validate_modrange()
+    print(f"{benchmark_modrange():.1f} ns per interval")
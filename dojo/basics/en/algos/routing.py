@@ -0,0 +1,167 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from graph import CSRGraph, open_graph
+from tree import dijkstra
+
+# Many-to-many routing
+# ------------------------------------------
+# One tree.dijkstra() per origin, run in a pool of workers over a read-only CSRGraph.
+# Each search stops at a cost cutoff, or once every destination is settled.
+#
+# The pure Python search holds the GIL, so processes are the default. Each
+# process sets up the graph once in its initializer: pass the path of a file
+# written by graph.save_graph() and every worker maps the same pages, or pass
+# a CSRGraph and it is inherited (fork) or pickled once per worker (spawn).
+# Threads share the graph directly and pay off when the per-origin work
+# releases the GIL.
+
+_graph = None  # The CSRGraph of this worker process
+
+def _init_worker(graph):
+    global _graph
+    _graph = open_graph(graph) if isinstance(graph, str) else graph
+
+def dijkstra_costs(graph, source, cutoff=math.inf, targets=None):
+    """
+    Single-source costs with an early stop, from tree.dijkstra().
+
+    Args:
+        graph (CSRGraph): The graph to search.
+        source (int): The origin node id.
+        cutoff (float): Nodes costing more than this are not settled.
+        targets (set): Optional node ids; the search stops once all are settled.
+
+    Returns:
+        dict: node id -> cost for every settled node.
+    """
+    dist, _, settled = dijkstra(source, graph, cutoff=cutoff, targets=targets)
+    return {node: dist[node] for node in settled}
+
+def _cost_rows(origins, destinations, cutoff, graph=None):
+    """
+    Worker task: one row of costs to the destinations per origin.
+    """
+    graph = _graph if graph is None else graph
+    targets = set(destinations)
+    rows = np.empty((len(origins), len(destinations)))
+    for i, origin in enumerate(origins):
+        settled = dijkstra_costs(graph, origin, cutoff, targets)
+        rows[i] = [settled.get(destination, math.inf) for destination in destinations]
+    return rows
+
+def _isochrone_sets(origins, budgets, graph=None):
+    """
+    Worker task: reachable node ids per budget for each origin.
+    """
+    graph = _graph if graph is None else graph
+    result = []
+    for origin in origins:
+        settled = dijkstra_costs(graph, origin, max(budgets))
+        nodes = np.fromiter(settled.keys(), dtype=np.int64, count=len(settled))
+        costs = np.fromiter(settled.values(), dtype=np.float64, count=len(settled))
+        result.append([np.sort(nodes[costs <= budget]) for budget in budgets])
+    return result
+
+def _run(task, origins, args, graph, workers, executor, chunk_size):
+    """
+    Splits origins into chunks and runs task on them in a pool, in order.
+    """
+    origins = [int(origin) for origin in origins]
+    chunks = [origins[i:i + chunk_size] for i in range(0, len(origins), chunk_size)]
+    if workers == 1:
+        local = open_graph(graph) if isinstance(graph, str) else graph
+        return [task(chunk, *args, graph=local) for chunk in chunks]
+    if executor == "process":
+        pool = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(graph,))
+        submit = lambda chunk: pool.submit(task, chunk, *args)
+    elif executor == "thread":
+        shared = open_graph(graph) if isinstance(graph, str) else graph
+        pool = ThreadPoolExecutor(workers)
+        submit = lambda chunk: pool.submit(task, chunk, *args, graph=shared)
+    else:
+        raise ValueError(f"unknown executor {executor!r}")
+    with pool:
+        return [future.result() for future in [submit(chunk) for chunk in chunks]]
+
+def cost_matrix(graph, origins, destinations, cutoff=math.inf, workers=None, executor="process",
+                sparse=False, chunk_size=16):
+    """
+    Travel costs from every origin to every destination.
+
+    Args:
+        graph (CSRGraph or str): The graph, or the path of a save_graph() file.
+        origins (list): Origin node ids.
+        destinations (list): Destination node ids.
+        cutoff (float): Costs above the cutoff are reported as unreachable.
+        workers (int): Pool size (defaults to the CPU count); 1 runs in this process.
+        executor (str): "process" or "thread".
+        sparse (bool): Return only the reachable pairs instead of a dense matrix.
+        chunk_size (int): Origins per task.
+
+    Returns:
+        np.ndarray: (len(origins), len(destinations)) costs with inf where a
+        destination is unreachable within the cutoff. With sparse, a tuple
+        (rows, cols, costs) of the finite entries, in COO order.
+    """
+    workers = workers or os.cpu_count() or 1
+    destinations = [int(destination) for destination in destinations]
+    parts = _run(_cost_rows, origins, (destinations, cutoff), graph, workers, executor, chunk_size)
+    if not sparse:
+        return np.concatenate(parts) if parts else np.empty((0, len(destinations)))
+    # Keep only the finite entries of each chunk, so no dense matrix is assembled
+    rows, cols, costs = [np.empty(0, dtype=np.int64)], [np.empty(0, dtype=np.int64)], [np.empty(0)]
+    for i, part in enumerate(parts):
+        part_rows, part_cols = np.nonzero(np.isfinite(part))
+        rows.append(part_rows + i * chunk_size)
+        cols.append(part_cols)
+        costs.append(part[part_rows, part_cols])
+    return np.concatenate(rows), np.concatenate(cols), np.concatenate(costs)
+
+def isochrones(graph, origins, budgets, workers=None, executor="process", chunk_size=16):
+    """
+    Nodes reachable from each origin within each cost budget.
+
+    Args:
+        graph (CSRGraph or str): The graph, or the path of a save_graph() file.
+        origins (list): Origin node ids.
+        budgets (list): Cost budgets, e.g. [300, 600, 900] seconds.
+        workers, executor, chunk_size: As in cost_matrix().
+
+    Returns:
+        list: For each origin, a list with one sorted array of node ids per budget.
+    """
+    budgets = list(budgets)
+    if not budgets:
+        raise ValueError("isochrones need at least one budget")
+    workers = workers or os.cpu_count() or 1
+    parts = _run(_isochrone_sets, origins, (budgets,), graph, workers, executor, chunk_size)
+    return [sets for part in parts for sets in part]
+
+
+# Example usage
+if __name__ == "__main__":
+    # A 100 x 100 grid of two-way streets, 60 to 180 seconds per block
+    rng = np.random.default_rng(0)
+    side = 100
+    ids = np.arange(side * side).reshape(side, side)
+    pairs = np.concatenate([np.column_stack([ids[:, :-1].ravel(), ids[:, 1:].ravel()]),
+                            np.column_stack([ids[:-1].ravel(), ids[1:].ravel()])])
+    times = rng.integers(60, 181, len(pairs))
+    graph = CSRGraph.from_edges(np.concatenate([pairs[:, 0], pairs[:, 1]]),
+                                np.concatenate([pairs[:, 1], pairs[:, 0]]),
+                                np.concatenate([times, times]))
+
+    origins = rng.choice(side * side, 20, replace=False)
+    destinations = rng.choice(side * side, 500, replace=False)
+    matrix = cost_matrix(graph, origins, destinations, cutoff=3600, workers=4)
+    print(matrix.shape, np.isfinite(matrix).mean())  # Share of pairs within an hour
+
+    rows, cols, costs = cost_matrix(graph, origins[:2], destinations, cutoff=1800, workers=2, sparse=True)
+    print(len(costs), "pairs within 30 minutes")
+
+    (fifteen, thirty), = isochrones(graph, [ids[50, 50]], [900, 1800], workers=1)
+    print(len(fifteen), len(thirty))  # Nodes within 15 and 30 minutes of the centre
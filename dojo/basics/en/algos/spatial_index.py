@@ -0,0 +1,435 @@
+import hashlib
+import os
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+import shapely
+
+# Reusable spatial index for sjoin and overlay
+# ------------------------------------------
+# gpd.sjoin() and gpd.overlay() build a fresh STRtree on every call. Here the
+# index of a layer is built once and reused:
+#
+#   PackedRTree         a static R-tree over the layer's bounding boxes, packed
+#                       in sort-tile-recursive (STR) order into flat arrays, so
+#                       it can be saved next to the data file and loaded back.
+#   SpatialIndexCache   finds the tree of a layer by its geometry array object,
+#                       then by a hash of its bounding boxes, then in the file
+#                       next to the data, and only builds it as a last resort.
+#   sjoin(), overlay()  the usual joins, using the cached tree for candidate
+#                       pairs and shapely's vectorised predicates to refine them.
+#
+# The tree only depends on the bounding boxes, and every candidate is checked
+# against the real geometries, so a hash of the boxes is all a tree has to
+# match. Geometries that change inside the same box keep their tree.
+
+def layer_bounds(layer):
+    """
+    (minx, miny, maxx, maxy) of every geometry of a GeoDataFrame or GeoSeries,
+    as an (n, 4) array; NaN for missing and empty geometries.
+    """
+    return shapely.bounds(np.asarray(layer.geometry.values))
+
+def bounds_key(bounds):
+    """
+    Content hash of a layer's bounding boxes.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.int64(len(bounds)).tobytes())
+    digest.update(np.ascontiguousarray(bounds, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+def index_path(data_path):
+    """
+    Where the index of a data file is saved: next to it, e.g. parcels.gpkg.sidx.npz.
+    """
+    return os.fspath(data_path) + ".sidx.npz"
+
+def _outward_float32(bounds):
+    """
+    Boxes rounded to float32 so they still contain the float64 boxes.
+    """
+    boxes = bounds.astype(np.float32)
+    low = boxes[:, :2] > bounds[:, :2]
+    boxes[:, :2][low] = np.nextafter(boxes[:, :2][low], np.float32(-np.inf))
+    high = boxes[:, 2:] < bounds[:, 2:]
+    boxes[:, 2:][high] = np.nextafter(boxes[:, 2:][high], np.float32(np.inf))
+    return boxes
+
+
+# Packed STR tree
+# ------------------------------------------
+# Level 0 holds the item boxes in STR order and order[k] is the layer row of
+# item k. Node j of level l + 1 covers entries j * capacity to
+# (j + 1) * capacity - 1 of level l, so child ranges need no pointers. The top
+# level has at most capacity nodes. Boxes are float32, rounded outwards, which
+# halves the memory of a large layer and never drops a candidate.
+class PackedRTree:
+    """
+    Static R-tree over bounding boxes, stored as flat arrays.
+    """
+    def __init__(self, order, levels, capacity, key):
+        self.order = np.asarray(order, dtype=np.int64)
+        self.levels = [np.asarray(boxes, dtype=np.float32) for boxes in levels]
+        self.capacity = int(capacity)
+        self.key = key
+
+    def __len__(self):
+        return len(self.order)
+
+    @classmethod
+    def build(cls, bounds, capacity=16, key=None):
+        """
+        Packs boxes into a tree.
+
+        Args:
+            bounds (np.ndarray): (n, 4) boxes as from layer_bounds().
+            capacity (int): Entries per node.
+            key (str): Content hash to store with the tree; defaults to bounds_key(bounds).
+
+        Returns:
+            PackedRTree: The tree.
+        """
+        bounds = np.asarray(bounds, dtype=np.float64)
+        key = bounds_key(bounds) if key is None else key
+        n = len(bounds)
+        centre_x = (bounds[:, 0] + bounds[:, 2]) / 2
+        centre_y = (bounds[:, 1] + bounds[:, 3]) / 2
+
+        # STR: sort by x into vertical slices of about sqrt(leaves) leaves each,
+        # then by y within each slice. Missing geometries (NaN) sort last.
+        leaves = -(-n // capacity)
+        slice_size = max(1, int(np.ceil(np.sqrt(leaves)))) * capacity
+        by_x = np.argsort(centre_x, kind="stable")
+        slices = np.empty(n, dtype=np.int64)
+        slices[by_x] = np.arange(n) // slice_size
+        order = np.lexsort((centre_y, slices))
+
+        levels = [_outward_float32(bounds[order])]
+        while len(levels[-1]) > capacity:
+            boxes = levels[-1]
+            starts = np.arange(0, len(boxes), capacity)
+            # fmin and fmax skip NaN boxes unless a whole node is missing geometries
+            levels.append(np.column_stack([np.fmin.reduceat(boxes[:, 0], starts),
+                                           np.fmin.reduceat(boxes[:, 1], starts),
+                                           np.fmax.reduceat(boxes[:, 2], starts),
+                                           np.fmax.reduceat(boxes[:, 3], starts)]))
+        return cls(order, levels, capacity, key)
+
+    def query(self, boxes, chunk_size=1 << 16):
+        """
+        Pairs of query boxes and tree items whose boxes intersect.
+
+        The tree is walked one level at a time for a chunk of queries at once:
+        every (query, node) pair that still intersects is replaced by its
+        children, and the pairs left at level 0 are the candidates.
+
+        Args:
+            boxes (np.ndarray): (m, 4) query boxes.
+            chunk_size (int): Queries walked together; bounds the memory of the pairs.
+
+        Returns:
+            tuple: (query positions, layer rows) as int64 arrays, sorted by query.
+        """
+        boxes = np.asarray(boxes, dtype=np.float64)
+        found_queries, found_items = [np.empty(0, dtype=np.int64)], [np.empty(0, dtype=np.int64)]
+        if len(self) == 0:
+            return found_queries[0], found_items[0]
+        capacity = self.capacity
+        for start in range(0, len(boxes), chunk_size):
+            chunk = boxes[start:start + chunk_size]
+            top = self.levels[-1]
+            queries = np.repeat(np.arange(len(chunk)), len(top))
+            nodes = np.tile(np.arange(len(top)), len(chunk))
+            for level in range(len(self.levels) - 1, -1, -1):
+                if level < len(self.levels) - 1:
+                    # Replace each node by its children on this level
+                    queries = np.repeat(queries, capacity)
+                    nodes = (nodes[:, None] * capacity + np.arange(capacity)).ravel()
+                    inside = nodes < len(self.levels[level])
+                    queries, nodes = queries[inside], nodes[inside]
+                node_boxes = self.levels[level][nodes]
+                query_boxes = chunk[queries]
+                hit = ((query_boxes[:, 0] <= node_boxes[:, 2]) & (query_boxes[:, 2] >= node_boxes[:, 0])
+                       & (query_boxes[:, 1] <= node_boxes[:, 3]) & (query_boxes[:, 3] >= node_boxes[:, 1]))
+                queries, nodes = queries[hit], nodes[hit]
+            found_queries.append(queries + start)
+            found_items.append(self.order[nodes])
+        return np.concatenate(found_queries), np.concatenate(found_items)
+
+    def save(self, path):
+        """
+        Writes the tree to an .npz file, by way of a temporary file renamed into place.
+        """
+        arrays = {"order": self.order, "capacity": np.int64(self.capacity), "key": np.str_(self.key)}
+        for level, boxes in enumerate(self.levels):
+            arrays[f"level_{level}"] = boxes
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads a tree written by save().
+        """
+        with np.load(path, allow_pickle=False) as data:
+            count = sum(name.startswith("level_") for name in data.files)
+            levels = [data[f"level_{level}"] for level in range(count)]
+            return cls(data["order"], levels, int(data["capacity"]), str(data["key"]))
+
+    @staticmethod
+    def saved_key(path):
+        """
+        Content hash of the tree saved at path, or None when there is no file.
+        Only the key is read, not the arrays.
+        """
+        if not os.path.exists(path):
+            return None
+        with np.load(path, allow_pickle=False) as data:
+            return str(data["key"])
+
+
+# Index cache
+# ------------------------------------------
+class SpatialIndexCache:
+    """
+    Trees of the layers seen in this process, least recently used evicted first.
+
+    A layer is first looked up by the identity of its geometry array
+    (layer.geometry.values): while a frame keeps the same array, it reuses its
+    tree without reading its geometries. Assigning new geometries, e.g.
+    gdf.geometry = gdf.translate(1, 1), replaces that array, so the layer is
+    hashed again with bounds_key(); copies and reloads of the same data share
+    a tree the same way. Only element-wise writes such as
+    gdf.loc[i, "geometry"] = ... change the array in place and need forget().
+    """
+    def __init__(self, max_entries=8, capacity=16):
+        self.max_entries = max_entries
+        self.capacity = capacity
+        self._keys = {}  # id(geometry array) -> (weak reference to the array, its length, its key)
+        self._trees = OrderedDict()  # key -> PackedRTree
+        self._sidecars = {}  # index file -> key of the tree it holds, for files read or written here
+        self.hits = self.loads = self.builds = 0
+
+    def key(self, layer):
+        """
+        Content hash of a layer, remembered for as long as its geometry array lives.
+        """
+        return self._lookup(layer)[0]
+
+    def _lookup(self, layer):
+        """
+        (key, bounds) of a layer; bounds is None when the key was remembered.
+        """
+        geometry = layer.geometry.values
+        entry = self._keys.get(id(geometry))
+        if entry is not None and entry[0]() is geometry and entry[1] == len(geometry):
+            return entry[2], None
+        bounds = layer_bounds(layer)
+        key = bounds_key(bounds)
+        geometry_id = id(geometry)
+        forget = lambda _, keys=self._keys: keys.pop(geometry_id, None)
+        self._keys[geometry_id] = (weakref.ref(geometry, forget), len(geometry), key)
+        return key, bounds
+
+    def get(self, layer, path=None):
+        """
+        Tree of a layer.
+
+        Args:
+            layer (GeoDataFrame or GeoSeries): The indexed layer.
+            path (str): Optional data file the layer was read from. The tree is
+                loaded from index_path(path) when that file matches the layer,
+                and saved there when it does not.
+
+        Returns:
+            PackedRTree: The tree, with rows numbered by position in the layer.
+        """
+        key, bounds = self._lookup(layer)
+        sidecar = None if path is None else index_path(path)
+        tree = self._trees.get(key)
+        if tree is not None:
+            self.hits += 1
+            self._trees.move_to_end(key)
+        else:
+            if sidecar is not None and self._saved_key(sidecar) == key:
+                tree = PackedRTree.load(sidecar)
+                self.loads += 1
+            else:  # No index file, or the data changed since it was saved
+                if bounds is None:
+                    bounds = layer_bounds(layer)
+                tree = PackedRTree.build(bounds, self.capacity, key)
+                self.builds += 1
+            self._trees[key] = tree
+            while len(self._trees) > self.max_entries:
+                self._trees.popitem(last=False)
+
+        if sidecar is not None and self._saved_key(sidecar) != key:
+            tree.save(sidecar)
+            self._sidecars[sidecar] = key
+        return tree
+
+    def _saved_key(self, sidecar):
+        """
+        Key of the tree in an index file, read once per file and then remembered.
+        """
+        if sidecar not in self._sidecars:
+            self._sidecars[sidecar] = PackedRTree.saved_key(sidecar)
+        return self._sidecars[sidecar]
+
+    def forget(self, layer):
+        """
+        Drops what is remembered about a layer, e.g. after editing its geometries.
+        """
+        entry = self._keys.pop(id(layer.geometry.values), None)
+        if entry is not None:
+            self._trees.pop(entry[2], None)
+
+    def clear(self):
+        self._keys.clear()
+        self._trees.clear()
+        self._sidecars.clear()
+
+default_cache = SpatialIndexCache()
+
+
+# Joins
+# ------------------------------------------
+def candidate_pairs(left, right, predicate="intersects", cache=None, right_path=None):
+    """
+    Row positions (i, j) where predicate(left geometry i, right geometry j) holds,
+    sorted by i then j. The predicate must imply that the two boxes intersect,
+    as every shapely predicate but disjoint does.
+    """
+    if predicate == "disjoint":
+        raise ValueError("disjoint pairs cannot be found through the index")
+    cache = default_cache if cache is None else cache
+    tree = cache.get(right, right_path)
+    i, j = tree.query(layer_bounds(left))
+    left_geoms = np.asarray(left.geometry.values)
+    right_geoms = np.asarray(right.geometry.values)
+    keep = getattr(shapely, predicate)(left_geoms[i], right_geoms[j])
+    i, j = i[keep], j[keep]
+    order = np.lexsort((j, i))
+    return i[order], j[order]
+
+def _take(series, positions):
+    """
+    Values of series at positions, with NaN where a position is -1.
+    """
+    values = series.iloc[np.maximum(positions, 0)].reset_index(drop=True)
+    return values.where(positions >= 0).to_numpy()
+
+def sjoin(left, right, how="inner", predicate="intersects", cache=None, right_path=None,
+          lsuffix="left", rsuffix="right"):
+    """
+    Spatial join like gpd.sjoin(), with the right layer's index taken from a cache.
+
+    Args:
+        left, right (GeoDataFrame): The layers; the result keeps left's rows and geometry.
+        how (str): "inner", or "left" to keep left rows without a match.
+        predicate (str): A shapely predicate, e.g. "intersects", "within", "contains".
+        cache (SpatialIndexCache): Defaults to the module's default_cache.
+        right_path (str): The file right was read from, to keep its index next to it.
+        lsuffix, rsuffix (str): Suffixes for column names found in both layers.
+
+    Returns:
+        GeoDataFrame: One row per matching pair, with left's index and the right
+        row's index in index_<rsuffix>.
+    """
+    if how not in ("inner", "left"):
+        raise ValueError(f"unknown how {how!r}")
+    i, j = candidate_pairs(left, right, predicate, cache, right_path)
+    if how == "left":
+        unmatched = np.setdiff1d(np.arange(len(left)), i)
+        i = np.concatenate([i, unmatched])
+        j = np.concatenate([j, np.full(len(unmatched), -1)])
+        order = np.argsort(i, kind="stable")
+        i, j = i[order], j[order]
+
+    result = left.iloc[i].copy()
+    right_columns = [column for column in right.columns if column != right.geometry.name]
+    shared = [column for column in right_columns if column in left.columns and column != left.geometry.name]
+    result = result.rename(columns={column: f"{column}_{lsuffix}" for column in shared})
+    result[f"index_{rsuffix}"] = _take(right.index.to_series(), j)
+    for column in right_columns:
+        name = f"{column}_{rsuffix}" if column in shared else column
+        result[name] = _take(right[column], j)
+    return result
+
+def overlay(df1, df2, how="intersection", cache=None, path2=None):
+    """
+    Intersection overlay like gpd.overlay(df1, df2, how="intersection"), with
+    df2's index taken from a cache.
+
+    Pieces of lower dimension than the df1 geometry they come from (e.g. the
+    shared edge of two touching polygons) are dropped, as keep_geom_type does.
+
+    Args:
+        df1, df2 (GeoDataFrame): The layers.
+        how (str): Only "intersection"; other overlays need no index lookups of their own.
+        cache (SpatialIndexCache): Defaults to the module's default_cache.
+        path2 (str): The file df2 was read from, to keep its index next to it.
+
+    Returns:
+        GeoDataFrame: One row per overlapping pair, with the columns of both
+        layers (suffixed _1 and _2 when shared) and the intersection as geometry.
+    """
+    if how != "intersection":
+        raise ValueError(f"unsupported how {how!r}; use gpd.overlay() for it")
+    i, j = candidate_pairs(df1, df2, "intersects", cache, path2)
+    left_geoms = np.asarray(df1.geometry.values)[i]
+    pieces = shapely.intersection(left_geoms, np.asarray(df2.geometry.values)[j])
+    keep = ~shapely.is_empty(pieces) & (shapely.get_dimensions(pieces) >= shapely.get_dimensions(left_geoms))
+    i, j, pieces = i[keep], j[keep], pieces[keep]
+
+    geometry = df1.geometry.name
+    result = df1.iloc[i].reset_index(drop=True)
+    right_columns = [column for column in df2.columns if column != df2.geometry.name]
+    shared = [column for column in right_columns if column in df1.columns and column != geometry]
+    result = result.rename(columns={column: f"{column}_1" for column in shared})
+    for column in right_columns:
+        name = f"{column}_2" if column in shared else column
+        result[name] = df2[column].iloc[j].to_numpy()
+    result[geometry] = pieces
+    return result[[column for column in result.columns if column != geometry] + [geometry]]  # Geometry last
+
+
+# Example usage
+if __name__ == "__main__":
+    import tempfile
+
+    # 100,000 random boxes and 1,000 query windows
+    rng = np.random.default_rng(0)
+    corners = rng.random((100_000, 2)) * 1000
+    bounds = np.column_stack([corners, corners + rng.random((100_000, 2)) * 5])
+    windows = np.column_stack([corners[:1000], corners[:1000] + 20])
+
+    tree = PackedRTree.build(bounds)
+    queries, rows = tree.query(windows)
+    print(len(rows), "candidate pairs,", len(tree.levels), "levels")
+
+    path = os.path.join(tempfile.gettempdir(), "boxes.sidx.npz")
+    tree.save(path)  # Build once ...
+    tree = PackedRTree.load(path)  # ... and load it in later runs
+    print(tree.key == bounds_key(bounds), len(tree.query(windows)[1]) == len(rows))
+    os.remove(path)
+
+    # Repeated joins of random points against a grid of square parcels
+    import geopandas as gpd
+
+    cells = np.stack(np.meshgrid(np.arange(100), np.arange(100)), axis=-1).reshape(-1, 2)
+    parcels = gpd.GeoDataFrame({"parcel": np.arange(len(cells))},
+                               geometry=shapely.box(cells[:, 0], cells[:, 1], cells[:, 0] + 1, cells[:, 1] + 1))
+    points = gpd.GeoDataFrame({"value": rng.random(1000)}, geometry=shapely.points(rng.random((1000, 2)) * 100))
+    cache = SpatialIndexCache()
+    for _ in range(3):
+        joined = sjoin(points, parcels, predicate="within", cache=cache)
+    print(len(joined), "points in parcels;", cache.builds, "build,", cache.hits, "hits")
+
+    parcels.geometry = parcels.translate(0.5, 0.5)  # New geometries: the old tree no longer applies
+    print(len(overlay(points.buffer(1).to_frame("geometry"), parcels, cache=cache)), "overlay pieces;",
+          cache.builds, "builds")
@@ -0,0 +1,191 @@
+import mmap
+import os
+from functools import lru_cache
+
+import numpy as np
+
+from minmax import (Bitboard, FULL_MASK, SYMMETRIES, WIN_LINES, TranspositionTable,
+                    best_move_and_score, canonical, to_bitboard)
+
+# Tablebase file layout
+# ------------------------------------------
+# An 8-byte header followed by one byte per base-3 board code (3^9 bytes).
+# Only canonical boards (see minmax.canonical) are filled in; every other byte,
+# and every full board, holds NO_ENTRY. A filled byte packs the solution of
+# get_best_move() on that board as (score + SCORE_OFFSET) << 4 | move.
+MAGIC = b"TTTBASE1"
+NUM_CODES = 3 ** 9
+NO_ENTRY = 0xFF
+SCORE_OFFSET = 8  # Scores lie in [-7, 7], so the high nibble is never 0xF with a valid move
+
+def decode(code):
+    """
+    Turn a base-3 board code back into a Bitboard.
+    """
+    x = o = 0
+    for i in range(9):
+        code, digit = divmod(code, 3)
+        if digit == 1:
+            x |= 1 << i
+        elif digit == 2:
+            o |= 1 << i
+    return Bitboard(x, o)
+
+def solve():
+    """
+    Solve every canonical board with at least one empty square.
+
+    Returns:
+        bytearray: The table body, NUM_CODES bytes.
+    """
+    table = bytearray([NO_ENTRY]) * NUM_CODES
+    tt = TranspositionTable(maxsize=1 << 20)  # Large enough to never evict
+    for code in range(NUM_CODES):
+        board = decode(code)
+        if board.x | board.o == FULL_MASK or canonical(board.x, board.o)[0] != code:
+            continue
+        move, score = best_move_and_score(board, tt)
+        table[code] = (score + SCORE_OFFSET) << 4 | move
+    return table
+
+def build_tablebase(path):
+    """
+    Solve the game offline and write the tablebase to path.
+
+    The file is written next to path and renamed into place, so readers never
+    see a partial table.
+    """
+    table = solve()
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(table)
+    os.replace(tmp_path, path)
+
+class Tablebase:
+    """
+    Read-only, memory-mapped view of a tablebase file.
+
+    The mapping is backed by the OS page cache, so every worker process that
+    opens the same file (or inherits an open Tablebase through fork) shares one
+    copy of the pages. Lookups are O(1) and never search.
+    """
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.data[:len(MAGIC)] != MAGIC or len(self.data) != len(MAGIC) + NUM_CODES:
+            self.data.close()
+            raise ValueError(f"{path} is not a tic-tac-toe tablebase")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.data.close()
+
+    def lookup(self, board):
+        """
+        Look up the computer's move on a list board or Bitboard.
+
+        Returns:
+            tuple: (move, score) with the same score as get_best_move()'s search.
+            When several moves share the best score the move may be a symmetric
+            image of the one the search picks. (None, None) for a full board.
+        """
+        if not isinstance(board, Bitboard):
+            board = to_bitboard(board)
+        code, t = canonical(board.x, board.o)
+        entry = self.data[len(MAGIC) + code]
+        if entry == NO_ENTRY:
+            return None, None
+        # The stored move is a square of the canonical board; map it back
+        return SYMMETRIES[t][entry & 0xF], (entry >> 4) - SCORE_OFFSET
+
+    def table(self):
+        """
+        The table body as a read-only uint8 array over the mapping.
+        Drop the array before calling close().
+        """
+        return np.frombuffer(self.data, dtype=np.uint8, offset=len(MAGIC))
+
+# Batched lookups
+# ------------------------------------------
+# Boards in a batch are int8 rows of 9 squares: 0 empty, 1 X, -1 O.
+SYMMETRY_ARRAY = np.array(SYMMETRIES, dtype=np.intp)  # (8, 9) square permutations
+WIN_LINE_ARRAY = np.array(WIN_LINES, dtype=np.intp)  # (8, 3) squares per line
+POWERS_OF_3 = 3 ** np.arange(9, dtype=np.int32)
+
+@lru_cache(maxsize=None)
+def solved_table():
+    """
+    In-memory table from solve(), built on first use when no tablebase file is given.
+    """
+    return np.frombuffer(bytes(solve()), dtype=np.uint8)
+
+def get_best_moves(boards, tablebase=None):
+    """
+    Get the computer's move for a whole batch of boards with array operations.
+
+    Args:
+        boards (np.ndarray): (N, 9) int8 boards, 0 empty, 1 X (computer), -1 O.
+        tablebase (Tablebase): Optional open tablebase; defaults to an
+            in-memory solve shared by all calls.
+
+    Returns:
+        tuple: (moves, scores), both (N,) int8. Finished games (a completed line
+        or a full board) get move -1 and their evaluate() score (+1, -1 or 0).
+        Other boards get the tablebase move and score, as in Tablebase.lookup().
+    """
+    boards = np.asarray(boards, dtype=np.int8)
+    if boards.ndim != 2 or boards.shape[1] != 9:
+        raise ValueError(f"boards must have shape (N, 9), got {boards.shape}")
+    rows = np.arange(len(boards))
+
+    # Win detection over all 8 lines of every board
+    lines = boards[:, WIN_LINE_ARRAY]  # (N, 8, 3)
+    x_wins = (lines == 1).all(axis=2).any(axis=1)
+    o_wins = (lines == -1).all(axis=2).any(axis=1)
+    finished = x_wins | o_wins | (boards != 0).all(axis=1)
+
+    # Canonical base-3 code of each board: smallest code over the 8 symmetries,
+    # ties broken towards the first symmetry like minmax.canonical()
+    digits = np.where(boards < 0, 2, boards).astype(np.int32)
+    codes = digits[:, SYMMETRY_ARRAY] @ POWERS_OF_3  # (N, 8)
+    symmetry = codes.argmin(axis=1)
+    canonical_codes = codes[rows, symmetry]
+
+    table = tablebase.table() if tablebase is not None else solved_table()
+    entries = np.where(finished, 0, table[canonical_codes])  # Full boards have no entry
+    moves = SYMMETRY_ARRAY[symmetry, entries & 0xF].astype(np.int8)
+    scores = ((entries >> 4).astype(np.int8) - SCORE_OFFSET)
+
+    moves[finished] = -1
+    scores[finished] = np.where(x_wins, 1, np.where(o_wins, -1, 0))[finished]
+    return moves, scores
+
+
+# Example usage
+if __name__ == "__main__":
+    from minmax import EMPTY, PLAYER_O, PLAYER_X, get_best_move
+
+    path = "tictactoe.tb"
+    if not os.path.exists(path):
+        build_tablebase(path)  # One-time offline solve
+
+    with Tablebase(path) as tablebase:
+        board = [EMPTY, EMPTY, EMPTY,
+                 EMPTY, PLAYER_O, EMPTY,
+                 EMPTY, EMPTY, PLAYER_X]
+        print(tablebase.lookup(board))  # (move, score)
+        print(get_best_move(board, tablebase=tablebase))  # Same move, no search
+
+        # Many boards at once: 0 empty, 1 X, -1 O
+        boards = np.array([[0, 0, 0, 0, 0, 0, 0, 0, 0],
+                           [0, 0, 0, 0, -1, 0, 0, 0, 1],
+                           [1, 1, 1, -1, -1, 0, 0, 0, 0]], dtype=np.int8)
+        moves, scores = get_best_moves(boards, tablebase)
+        print(moves, scores)  # The finished game gets move -1
+        del moves, scores
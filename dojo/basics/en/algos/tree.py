@@ -1,5 +1,13 @@
+import heapq  # Binary heap used as a priority queue
+import math
+import time
+from collections import deque  # Queue with O(1) appends and pops at both ends
+
 import numpy as np  # Importing the NumPy library
 
+from graph import CSRGraph, gather_ranges  # Array-backed graph with integer node ids
+from minmax import WIN_LINES  # The 8 winning lines of tic-tac-toe
+
 # Tree Structure
 # ------------------------------------------
 tree = {
@@ -14,185 +22,730 @@ tree = {
     'I': np.array([])   # Node I has no children
 }
 
+# Every search below also accepts a graph argument: a dict like tree (the
+# default), or a CSRGraph whose nodes are integer ids (see graph.py).
+NO_CHILDREN = np.array([])  # Shared result for nodes missing from a dict graph
+
+def children_of(graph, node):
+    """
+    Returns the children of a node in a dict graph or a CSRGraph, as a
+    sequence; the children of a weighted dict graph are its keys, in order.
+    """
+    if isinstance(graph, CSRGraph):
+        return graph.neighbors(node)
+    children = graph.get(node, NO_CHILDREN)
+    return list(children) if isinstance(children, dict) else children
+
+def edges_of(graph, node):
+    """
+    Returns (child, cost) pairs for the out-edges of a node. Edges of a dict
+    graph cost 1 unless the children are given as a dict of child -> cost.
+    """
+    if isinstance(graph, CSRGraph):
+        return zip(graph.neighbors(node).tolist(), graph.edge_weights(node).tolist())
+    children = graph.get(node, NO_CHILDREN)
+    if isinstance(children, dict):
+        return children.items()
+    if isinstance(children, np.ndarray):
+        children = children.tolist()
+    return ((child, 1) for child in children)
+
+def reverse_graph(graph):
+    """
+    Returns the graph with every edge reversed: a CSRGraph for a CSRGraph,
+    otherwise a dict of node -> {parent: cost}.
+    """
+    if isinstance(graph, CSRGraph):
+        return graph.reverse()
+    reverse = {}
+    for node in graph:
+        for child, cost in edges_of(graph, node):
+            reverse.setdefault(child, {})[node] = cost
+    return reverse
+
+def node_label(graph, node):
+    """
+    Returns the name to print for a node: its name in a CSRGraph with names,
+    otherwise the node itself.
+    """
+    if isinstance(graph, CSRGraph):
+        return graph.name(node)
+    return node
+
+
+# Search Visitors
+# ------------------------------------------
+# Every search below takes an optional visitor and calls its hooks as it runs.
+# Without one (the default) the only cost is an "is not None" test per event.
+class SearchVisitor:
+    """
+    Base visitor: every hook does nothing. Override the ones you need.
+    """
+    def on_start(self, phase):
+        """
+        A phase begins: a whole search ('dfs', 'ucs', ...), or one of the
+        'select', 'rollout' and 'backpropagate' steps of an mcts() batch.
+        """
+
+    def on_discover(self, node, parent):
+        """
+        node was added to the frontier from parent (None for the root).
+        """
+
+    def on_expand(self, node, frontier):
+        """
+        node was taken from the frontier and visited; frontier is the number
+        of entries left on the stack, queue or heap.
+        """
+
+    def on_relax(self, node, child, cost):
+        """
+        The edge node -> child gave child a cheaper path cost.
+        """
+
+    def on_finish(self, phase):
+        """
+        The phase begun by on_start(phase) ended.
+        """
+
+class PrintVisitor(SearchVisitor):
+    """
+    Prints every visited node, by name for a CSRGraph with names.
+    """
+    def __init__(self, graph=None):
+        self.graph = graph
+
+    def on_expand(self, node, frontier):
+        print("Visited node:", node_label(self.graph, node))
+
+class StatsVisitor(SearchVisitor):
+    """
+    Counts events and times phases, with a few attribute updates per event.
+    Times of phases with the same name add up across searches.
+    """
+    def __init__(self):
+        self.discovered = 0  # Nodes added to a frontier
+        self.expansions = 0  # Nodes visited
+        self.relaxations = 0  # Edges that lowered a path cost
+        self.peak_frontier = 0  # Largest frontier seen at an expansion
+        self.elapsed = {}  # Seconds per phase
+        self._started = {}
+
+    def on_start(self, phase):
+        self._started[phase] = time.perf_counter()
+
+    def on_discover(self, node, parent):
+        self.discovered += 1
+
+    def on_expand(self, node, frontier):
+        self.expansions += 1
+        if frontier > self.peak_frontier:
+            self.peak_frontier = frontier
+
+    def on_relax(self, node, child, cost):
+        self.relaxations += 1
+
+    def on_finish(self, phase):
+        started = self._started.pop(phase, None)
+        if started is not None:
+            self.elapsed[phase] = self.elapsed.get(phase, 0.0) + time.perf_counter() - started
+
+    @property
+    def expansions_per_sec(self):
+        total = sum(self.elapsed.values())
+        return self.expansions / total if total > 0 else 0.0
+
+    def as_dict(self):
+        return {
+            "discovered": self.discovered,
+            "expansions": self.expansions,
+            "relaxations": self.relaxations,
+            "peak_frontier": self.peak_frontier,
+            "elapsed": dict(self.elapsed)
+        }
+
 # Depth-First Search (DFS)
 # ------------------------------------------
-def dfs(node):
+def iter_dfs(root, graph=None, visitor=None):
+    """
+    Lazily walks the graph depth-first from root with an explicit stack.
+
+    Children are visited in order, as in a recursive DFS, and every node is
+    visited once, so graphs with cycles or shared children are safe.
+
+    Args:
+        root (str or int): The starting node (a node id for a CSRGraph).
+        graph (dict or CSRGraph): The graph to search. Defaults to tree.
+        visitor (SearchVisitor): Optional hooks, called as nodes are pushed and popped.
+
+    Yields:
+        tuple: (node, depth) for each node in visiting order.
+    """
+    graph = tree if graph is None else graph
+    visited = set()
+    stack = [(root, 0)]
+    if visitor is not None:
+        visitor.on_discover(root, None)
+    while stack:
+        node, depth = stack.pop()
+        if node in visited:
+            continue
+        visited.add(node)
+        if visitor is not None:
+            visitor.on_expand(node, len(stack))
+        yield node, depth
+        children = children_of(graph, node)
+        if visitor is not None:
+            for child in children[::-1]:
+                visitor.on_discover(child, node)
+        stack.extend((child, depth + 1) for child in children[::-1])  # Reversed so the first child is popped first
+
+def dfs(node, graph=None, visitor=None):
     """
     Performs Depth-First Search (DFS) on the tree starting from the given node.
 
     Args:
-        node (str): The starting node for DFS.
+        node (str or int): The starting node for DFS (a node id for a CSRGraph).
+        graph (dict or CSRGraph): The graph to search. Defaults to tree.
+        visitor (SearchVisitor): Optional hooks; pass PrintVisitor() to print the visited nodes.
 
     Returns:
         None
     """
     if node is None:
-        return  # Exit the current recursion if the node is None
-    print("Visited node:", node)  # Print the current node being visited
-    children = tree.get(node, np.array([]))  # Get the children of the current node from the tree dictionary
-    for child in children:
-        dfs(child)
+        return  # Nothing to search
+    graph = tree if graph is None else graph
+    if visitor is not None:
+        visitor.on_start("dfs")
+    for _ in iter_dfs(node, graph, visitor):
+        pass
+    if visitor is not None:
+        visitor.on_finish("dfs")
 
 
 # Breadth-First Search (BFS)
 # ------------------------------------------
-def bfs(root):
+def bfs(root, graph=None, visitor=None):
     """
     Performs Breadth-First Search (BFS) on the tree starting from the given root node.
+    Every reachable node is visited once, so graphs with cycles are safe.
 
     Args:
-        root (str): The root node for BFS.
+        root (str or int): The root node for BFS (a node id for a CSRGraph).
+        graph (dict or CSRGraph): The graph to search. Defaults to tree.
+        visitor (SearchVisitor): Optional hooks; pass PrintVisitor() to print the visited nodes.
 
     Returns:
         None
     """
-    queue = [root]  # Initialize a queue with the root node
+    graph = tree if graph is None else graph
+    queue = deque([root])  # Initialize a queue with the root node
+    seen = {root}  # Nodes are marked when enqueued, so cycles and shared children are queued once
+    if visitor is not None:
+        visitor.on_start("bfs")
+        visitor.on_discover(root, None)
 
     while queue:
-        node = queue.pop(0)  # Get the node from the front of the queue
-        print("Visited node:", node)  # Print the visited node
+        node = queue.popleft()  # Get the node from the front of the queue
+        if visitor is not None:
+            visitor.on_expand(node, len(queue))
+
+        for child in children_of(graph, node):  # Get the children of the current node
+            if child in seen:
+                continue
+            seen.add(child)
+            if visitor is not None:
+                visitor.on_discover(child, node)
+            queue.append(child)  # Add the child to the end of the queue for exploration
+
+    if visitor is not None:
+        visitor.on_finish("bfs")
+
+
+def bfs_levels(root, graph=None):
+    """
+    Computes the hop distance and BFS parent of every node reachable from root.
+
+    A CSRGraph is expanded one whole frontier at a time with array operations;
+    a dict graph falls back to a deque-based BFS.
 
-        children = tree.get(node, np.array([]))  # Get the children of the current node
-        queue.extend(children)  # Add the children to the end of the queue for exploration
+    Args:
+        root (str or int): The root node (a node id for a CSRGraph).
+        graph (dict or CSRGraph): The graph to search. Defaults to tree.
+
+    Returns:
+        tuple: (depth, parent). For a CSRGraph, int64 arrays indexed by node id
+        with -1 for unreached nodes and for the root's parent. For a dict graph,
+        dicts over the reached nodes with parent[root] = None.
+    """
+    graph = tree if graph is None else graph
+    if not isinstance(graph, CSRGraph):
+        depth, parent = {root: 0}, {root: None}
+        queue = deque([root])
+        while queue:
+            node = queue.popleft()
+            for child in children_of(graph, node):
+                if child not in depth:
+                    depth[child] = depth[node] + 1
+                    parent[child] = node
+                    queue.append(child)
+        return depth, parent
+
+    indptr, indices = graph.indptr, graph.indices
+    depth = np.full(graph.num_nodes, -1, dtype=np.int64)
+    parent = np.full(graph.num_nodes, -1, dtype=np.int64)
+    visited = np.zeros(graph.num_nodes, dtype=bool)  # Visited bitmap
+    visited[root] = True
+    depth[root] = 0
+    frontier = np.array([root], dtype=np.int64)
+    level = 0
+    while len(frontier):
+        # Gather every out-edge of the frontier in one go
+        starts = indptr[frontier]
+        counts = indptr[frontier + 1] - starts
+        total = counts.sum()
+        if total == 0:
+            break
+        edges = gather_ranges(starts, counts)
+        children = indices[edges]
+        sources = np.repeat(frontier, counts)
+
+        # Drop visited children, then keep one entry per child: each entry
+        # writes its position into parent and only the surviving write keeps it
+        unseen = ~visited[children]
+        children, sources = children[unseen], sources[unseen]
+        positions = np.arange(len(children))
+        parent[children] = positions
+        first = parent[children] == positions
+        children, sources = children[first], sources[first]
+
+        level += 1
+        visited[children] = True
+        depth[children] = level
+        parent[children] = sources
+        frontier = children
+    return depth, parent
 
 
 # Uniform Cost Search (UCS)
 # ------------------------------------------
-def ucs(root):
+def dijkstra(root, graph=None, target=None, cutoff=math.inf, targets=None, visitor=None, phase="ucs"):
     """
-    Performs Uniform Cost Search (UCS) on the tree starting from the given root node.
+    Dijkstra's algorithm from root, the search loop behind ucs() and routing.py.
+
+    Nodes are settled in order of path cost using a binary heap. Entries made
+    stale by a cheaper path are skipped when popped (lazy deletion).
 
     Args:
-        root (str): The root node for UCS.
+        root (str or int): The start node (a node id for a CSRGraph).
+        graph (dict or CSRGraph): The graph to search. Defaults to tree.
+        target (str or int): Optional node at which to stop once it is settled.
+        cutoff (float): Nodes costing more than this are not settled.
+        targets (set): Optional nodes; the search stops once all are settled.
+        visitor (SearchVisitor): Optional hooks.
+        phase (str): Name passed to the visitor's on_start and on_finish.
 
     Returns:
-        None
+        tuple: (dist, pred, settled). dist and pred are dicts over the reached
+        nodes with pred[root] = None; the costs in dist are final for the nodes
+        in the settled set.
     """
+    graph = tree if graph is None else graph
+    dist = {root: 0}  # Best known cost of every reached node
+    pred = {root: None}  # Predecessor on the best known path
+    settled = set()  # Nodes whose cost is final
     queue = [(0, root)]  # Initialize a priority queue with the root node and its cost
+    remaining = len(targets) if targets is not None else -1  # Targets not settled yet
+    if visitor is not None:
+        visitor.on_start(phase)
+        visitor.on_discover(root, None)
     while queue:
-        cost, node = queue.pop(0)  # Get the node with the minimum cost from the front of the queue
-        print("Visited node:", node)  # Print the visited node
-        children = tree.get(node, np.array([]))  # Get the children of the current node
-        queue.extend([(cost + 1, child) for child in children])  # Add the children to the queue with updated costs
+        cost, node = heapq.heappop(queue)  # Get the node with the minimum cost
+        if node in settled:  # A cheaper entry for this node was already popped
+            continue
+        if cost > cutoff:  # Every node left costs more than the cutoff
+            break
+        settled.add(node)
+        if visitor is not None:
+            visitor.on_expand(node, len(queue))
+        if node == target:  # Stop early once the target's cost is final
+            break
+        if targets is not None and node in targets:
+            remaining -= 1
+            if remaining == 0:  # Every target's cost is final
+                break
+        for child, weight in edges_of(graph, node):
+            new_cost = cost + weight
+            if new_cost < dist.get(child, math.inf):  # Relax the edge
+                if visitor is not None:
+                    if child not in dist:
+                        visitor.on_discover(child, node)
+                    visitor.on_relax(node, child, new_cost)
+                dist[child] = new_cost
+                pred[child] = node
+                heapq.heappush(queue, (new_cost, child))  # Add the child with its updated cost
+    if visitor is not None:
+        visitor.on_finish(phase)
+    return dist, pred, settled
+
+def ucs(root, graph=None, target=None, visitor=None, cutoff=math.inf, targets=None):
+    """
+    Performs Uniform Cost Search (UCS), i.e. Dijkstra's algorithm, on the tree starting from the given root node.
+
+    Args:
+        root (str or int): The root node for UCS (a node id for a CSRGraph).
+        graph (dict or CSRGraph): The graph to search. Defaults to tree.
+        target (str or int): Optional node at which to stop once it is settled.
+        visitor (SearchVisitor): Optional hooks; pass PrintVisitor() to print the settled nodes.
+        cutoff (float): Nodes costing more than this are not settled.
+        targets (set): Optional nodes; the search stops once all are settled.
+
+    Returns:
+        tuple: (dist, pred). For a CSRGraph, arrays indexed by node id with inf
+        and -1 for unreached nodes. For a dict graph, dicts over the reached
+        nodes with pred[root] = None. With a target or targets, only nodes
+        settled before the search stopped are guaranteed to have final
+        distances; with a cutoff, those are the nodes whose distance is within it.
+    """
+    graph = tree if graph is None else graph
+    dist, pred, _ = dijkstra(root, graph, target, cutoff, targets, visitor)
+    if not isinstance(graph, CSRGraph):
+        return dist, pred
+    dist_array = np.full(graph.num_nodes, np.inf)
+    pred_array = np.full(graph.num_nodes, -1, dtype=np.int64)
+    dist_array[list(dist)] = list(dist.values())
+    del pred[root]
+    pred_array[list(pred)] = list(pred.values())
+    return dist_array, pred_array
+
+def reconstruct_path(pred, target):
+    """
+    Follows predecessors back from target to the root of a search.
+
+    Args:
+        pred (dict or np.ndarray): Predecessors from ucs() or bfs_levels().
+        target (str or int): A node the search reached.
+
+    Returns:
+        list: The nodes from the root to target.
+    """
+    path = [target]
+    node = pred[target]
+    while node is not None and node != -1:
+        path.append(node)
+        node = pred[node]
+    path.reverse()
+    return path
+
+def bidirectional_ucs(source, target, graph=None, reverse=None):
+    """
+    Finds a cheapest path between two nodes by running UCS forward from source
+    and backward from target until the two searches meet.
+
+    Args:
+        source (str or int): The start node (a node id for a CSRGraph).
+        target (str or int): The end node.
+        graph (dict or CSRGraph): The graph to search. Defaults to tree.
+        reverse (dict or CSRGraph): reverse_graph(graph); pass it in to reuse
+            it across queries on the same graph.
+
+    Returns:
+        tuple: (cost, path) with the path as a list of nodes, or (inf, None)
+        when target cannot be reached.
+    """
+    graph = tree if graph is None else graph
+    if source == target:
+        return 0, [source]
+    graphs = (graph, reverse_graph(graph) if reverse is None else reverse)
+    dist = ({source: 0}, {target: 0})
+    pred = ({source: None}, {target: None})
+    settled = (set(), set())
+    queues = ([(0, source)], [(0, target)])
+    best, meet = math.inf, None
+
+    # Expand the side with the cheaper frontier until no path through the
+    # unsettled nodes can beat the best meeting point found so far
+    while queues[0] and queues[1] and queues[0][0][0] + queues[1][0][0] < best:
+        side = 0 if queues[0][0][0] <= queues[1][0][0] else 1
+        cost, node = heapq.heappop(queues[side])
+        if node in settled[side]:
+            continue
+        settled[side].add(node)
+        for child, weight in edges_of(graphs[side], node):
+            new_cost = cost + weight
+            if new_cost < dist[side].get(child, math.inf):
+                dist[side][child] = new_cost
+                pred[side][child] = node
+                heapq.heappush(queues[side], (new_cost, child))
+            if child in dist[1 - side] and dist[side][child] + dist[1 - side][child] < best:
+                best = dist[side][child] + dist[1 - side][child]
+                meet = child
+
+    if meet is None:
+        return math.inf, None
+    path = reconstruct_path(pred[0], meet)  # source .. meet
+    node = pred[1][meet]
+    while node is not None:  # meet .. target along the backward predecessors
+        path.append(node)
+        node = pred[1][node]
+    return best, path
 
 
 # Iterative Deepening Depth-First Search (IDDFS)
 # ------------------------------------------
-def iddfs(root, depth_limit):
+def iter_dfs_limit(root, limit, graph=None, transpositions=False, visitor=None):
+    """
+    Lazily walks the graph depth-first from root, down to a depth limit, with an explicit stack.
+
+    Without transpositions a node is visited once per path that reaches it, as in
+    a tree. With transpositions a node is skipped when it was already reached in
+    this walk at the same or a smaller depth, which avoids re-expanding shared
+    subgraphs of graphs that are not trees.
+
+    Args:
+        root (str or int): The starting node (a node id for a CSRGraph).
+        limit (int): The maximum depth to visit.
+        graph (dict or CSRGraph): The graph to search. Defaults to tree.
+        transpositions (bool): Skip nodes already reached at a smaller or equal depth.
+        visitor (SearchVisitor): Optional hooks, called as nodes are pushed and popped.
+
+    Yields:
+        tuple: (node, depth) for each visit, in visiting order.
+    """
+    graph = tree if graph is None else graph
+    shallowest = {}  # Smallest depth each node was reached at, with transpositions
+    stack = [(root, 0)]
+    if visitor is not None:
+        visitor.on_discover(root, None)
+    while stack:
+        node, depth = stack.pop()
+        if transpositions:
+            if shallowest.get(node, math.inf) <= depth:
+                continue
+            shallowest[node] = depth
+        if visitor is not None:
+            visitor.on_expand(node, len(stack))
+        yield node, depth
+        if depth < limit:
+            children = children_of(graph, node)
+            if visitor is not None:
+                for child in children[::-1]:
+                    visitor.on_discover(child, node)
+            stack.extend((child, depth + 1) for child in children[::-1])
+
+def iter_iddfs(root, depth_limit, graph=None, transpositions=False, visitor=None):
+    """
+    Lazily runs depth-limited searches with limits 0, 1, ..., depth_limit.
+
+    Each iteration only yields the nodes at its own limit, so every depth level
+    is reported once even though the shallower levels are walked again. Stops
+    early when an iteration finds no node at its limit. A visitor sees every
+    visit of every iteration, shallower levels included.
+
+    Yields:
+        tuple: (node, depth) for the nodes at each new depth level.
+    """
+    for limit in range(depth_limit + 1):  # Iterate over the depth limits from 0 to the specified depth limit
+        reached_limit = False
+        for node, depth in iter_dfs_limit(root, limit, graph, transpositions, visitor):
+            if depth == limit:
+                reached_limit = True
+                yield node, depth
+        if not reached_limit:  # The graph has no nodes this deep
+            return
+
+def iddfs(root, depth_limit, graph=None, goal=None, transpositions=False, visitor=None):
     """
     Performs Iterative Deepening Depth-First Search (IDDFS) on the tree starting from the given root node.
 
     Args:
-        root (str): The root node for IDDFS.
+        root (str or int): The root node for IDDFS (a node id for a CSRGraph).
         depth_limit (int): The maximum depth to explore.
+        graph (dict or CSRGraph): The graph to search. Defaults to tree.
+        goal: Optional goal node, or a callable goal(node) -> bool.
+        transpositions (bool): Skip nodes already reached at a smaller or equal
+            depth within an iteration, for graphs that are not trees.
+        visitor (SearchVisitor): Optional hooks; pass PrintVisitor() to print every visit.
 
     Returns:
-        None
+        tuple: (node, depth) of the shallowest goal node found, or None.
     """
-    for depth in range(depth_limit + 1):  # Iterate over the depth limits from 0 to the specified depth limit
-        if dfs_limit(root, depth):  # Call a helper function to perform DFS with a depth limit
-            return
+    graph = tree if graph is None else graph
+    if goal is None:
+        is_goal = lambda node: False
+    elif callable(goal):
+        is_goal = goal
+    else:
+        is_goal = lambda node: node == goal
+    if visitor is not None:
+        visitor.on_start("iddfs")
+    result = None
+    for node, depth in iter_iddfs(root, depth_limit, graph, transpositions, visitor):
+        if is_goal(node):
+            result = node, depth
+            break
+    if visitor is not None:
+        visitor.on_finish("iddfs")
+    return result
+
+
+# Heuristic Search Engine
+# ------------------------------------------
+def heuristic_search(root, graph=None, goal=None, heuristic=None, cost_weight=1, reopen=True,
+                     visitor=None, phase="heuristic_search"):
+    """
+    Shared best-first engine behind astar, best_first and greedy.
+
+    Nodes are expanded in order of cost_weight * g + h from a binary heap, where
+    g is the path cost so far and h the heuristic. A best-g map records the
+    cheapest known path to every node; heap entries made stale by a cheaper
+    path are skipped when popped, so each expansion costs O(log n).
+
+    Args:
+        root (str or int): The start node (a node id for a CSRGraph).
+        graph (dict or CSRGraph): The graph to search. Defaults to tree.
+        goal: A goal node, or a callable goal(node) -> bool. With no goal the
+            search expands every reachable node.
+        heuristic: A callable heuristic(node) -> float, or a dict/array indexed
+            by node (by node id for a CSRGraph). Defaults to 0 everywhere.
+        cost_weight (float): 1 orders by g + h (A*), 0 by h alone.
+        reopen (bool): Expand a node again when a cheaper path to it is found.
+        visitor (SearchVisitor): Optional hooks; pass PrintVisitor() to print the expanded nodes.
+        phase (str): The phase name reported to the visitor.
 
-def dfs_limit(node, depth):
+    Returns:
+        tuple: (path, cost) to the first goal node expanded, or (None, inf).
+    """
+    graph = tree if graph is None else graph
+    if heuristic is None:
+        h = lambda node: 0
+    elif callable(heuristic):
+        h = heuristic
+    else:
+        h = heuristic.__getitem__
+    if goal is None:
+        is_goal = lambda node: False
+    elif callable(goal):
+        is_goal = goal
+    else:
+        is_goal = lambda node: node == goal
+
+    best_g = {root: 0}  # Cheapest known path cost to every discovered node
+    parent = {root: None}
+    closed = set()  # Expanded nodes, when reopen is False
+    open_heap = [(h(root), 0, root)]  # Priority queue of (f, g, node)
+    if visitor is not None:
+        visitor.on_start(phase)
+        visitor.on_discover(root, None)
+    result = None, math.inf
+    while open_heap:
+        _, g, node = heapq.heappop(open_heap)  # Get the node with the minimum priority
+        if g > best_g[node] or node in closed:  # Stale entry or already expanded
+            continue
+        if not reopen:
+            closed.add(node)
+        if visitor is not None:
+            visitor.on_expand(node, len(open_heap))
+        if is_goal(node):  # If the goal node is found
+            result = reconstruct_path(parent, node), g
+            break
+        for child, weight in edges_of(graph, node):
+            child_g = g + weight
+            if child_g < best_g.get(child, math.inf) and child not in closed:
+                if visitor is not None:
+                    if child not in best_g:
+                        visitor.on_discover(child, node)
+                    visitor.on_relax(node, child, child_g)
+                best_g[child] = child_g
+                parent[child] = node
+                heapq.heappush(open_heap, (cost_weight * child_g + h(child), child_g, child))
+    if visitor is not None:
+        visitor.on_finish(phase)
+    return result
+
+def haversine_heuristic(coords, goal, radius=6371008.8):
     """
-    Helper function for IDDFS that performs DFS with a depth limit.
+    Great-circle distance from every node to the goal, for geographic graphs.
+
+    Never overestimates when edge weights are lengths along the ground in the
+    same unit as radius (metres by default), so A* stays optimal.
 
     Args:
-        node (str): The current node.
-        depth (int): The remaining depth limit.
+        coords (np.ndarray): (N, 2) array of node (longitude, latitude) in degrees.
+        goal (int): The goal node id.
+        radius (float): The sphere radius.
 
     Returns:
-        bool: True if the goal node is found within the depth limit, False otherwise.
+        np.ndarray: (N,) distances, to pass as the heuristic of a CSRGraph search.
     """
-    if depth == 0:  # If the depth limit is reached
-        print("Visited node:", node)  # Print the visited node
-        return True
-    children = tree.get(node, np.array([]))  # Get the children of the current node
-    for child in children:
-        if dfs_limit(child, depth - 1):  # Recursively call the helper function with the child node and reduced depth limit
-            return True
-    return False
+    lon, lat = np.radians(coords[:, 0]), np.radians(coords[:, 1])
+    goal_lon, goal_lat = lon[goal], lat[goal]
+    a = (np.sin((lat - goal_lat) / 2) ** 2
+         + np.cos(lat) * np.cos(goal_lat) * np.sin((lon - goal_lon) / 2) ** 2)
+    return 2 * radius * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
 
 
 # A* Search
 # ------------------------------------------
-def astar(root, heuristic):
+def astar(root, heuristic, graph=None, goal=None, visitor=None):
     """
     Performs A* Search on the tree starting from the given root node using the specified heuristic function.
 
     Args:
-        root (str): The root node for A* Search.
-        heuristic (dict): The heuristic function that estimates the cost from each node to the goal node.
+        root (str or int): The root node for A* Search (a node id for a CSRGraph).
+        heuristic (dict or callable): The heuristic function that estimates the cost from each node to the goal node.
+            For a CSRGraph, anything indexable by node id, such as an array.
+        graph (dict or CSRGraph): The graph to search. Defaults to tree.
+        goal: The goal node, or a callable goal(node) -> bool.
+        visitor (SearchVisitor): Optional hooks; pass PrintVisitor() to print the expanded nodes.
 
     Returns:
-        None
+        tuple: (path, cost) to the goal, or (None, inf).
     """
-    open_list = [(heuristic[root], 0, root)]  # Initialize a priority queue with the root node, its cost, and heuristic value
-    closed_list = set()  # Initialize a set to store visited nodes
-    while open_list:
-        _, cost, node = min(open_list)  # Get the node with the minimum combined cost and heuristic value
-        open_list.remove((heuristic[node], cost, node))  # Remove the node from the open list
-        closed_list.add(node)  # Add the node to the closed list
-        print("Visited node:", node)  # Print the visited node
-        if node == goal:  # If the goal node is found
-            return
-        children = tree.get(node, np.array([]))  # Get the children of the current node
-        for child in children:
-            if child not in closed_list:  # If the child node has not been visited
-                g = cost + 1  # Increment the cost by 1
-                h = heuristic[child]  # Get the heuristic value for the child node
-                f = g + h  # Calculate the combined cost and heuristic value
-                open_list.append((f, g, child))  # Add the child node to the open list with the updated values
+    return heuristic_search(root, graph, goal, heuristic, cost_weight=1, reopen=True,
+                            visitor=visitor, phase="astar")
 
 # Best-First Search
 # ------------------------------------------
-def best_first(root, heuristic):
+def best_first(root, heuristic, graph=None, goal=None, visitor=None):
     """
     Performs Best-First Search on the tree starting from the given root node using the specified heuristic function.
+    Every node is expanded at most once.
 
     Args:
-        root (str): The root node for Best-First Search.
-        heuristic (dict): The heuristic function that estimates the desirability of each node.
+        root (str or int): The root node for Best-First Search (a node id for a CSRGraph).
+        heuristic (dict or callable): The heuristic function that estimates the desirability of each node.
+            For a CSRGraph, anything indexable by node id, such as an array.
+        graph (dict or CSRGraph): The graph to search. Defaults to tree.
+        goal: The goal node, or a callable goal(node) -> bool.
+        visitor (SearchVisitor): Optional hooks; pass PrintVisitor() to print the expanded nodes.
 
     Returns:
-        None
+        tuple: (path, cost) to the goal, or (None, inf).
     """
-    open_list = [(heuristic[root], root)]  # Initialize a priority queue with the root node and its heuristic value
-    closed_list = set()  # Initialize a set to store visited nodes
-    while open_list:
-        _, node = min(open_list)  # Get the node with the minimum heuristic value
-        open_list.remove((heuristic[node], node))  # Remove the node from the open list
-        closed_list.add(node)  # Add the node to the closed list
-        print("Visited node:", node)  # Print the visited node
-        if node == goal:  # If the goal node is found
-            return
-        children = tree.get(node, np.array([]))  # Get the children of the current node
-        for child in children:
-            if child not in closed_list:  # If the child node has not been visited
-                open_list.append((heuristic[child], child))  # Add the child node to the open list
+    return heuristic_search(root, graph, goal, heuristic, cost_weight=0, reopen=False,
+                            visitor=visitor, phase="best_first")
 
 # Greedy Search
 # ------------------------------------------
-def greedy(root, heuristic):
+def greedy(root, heuristic, graph=None, goal=None, visitor=None):
     """
     Performs Greedy Search on the tree starting from the given root node using the specified heuristic function.
+    Like the best-first search, but a node is expanded again when reached by a cheaper path.
 
     Args:
-        root (str): The root node for Greedy Search.
-        heuristic (dict): The heuristic function that estimates the desirability of each node.
+        root (str or int): The root node for Greedy Search (a node id for a CSRGraph).
+        heuristic (dict or callable): The heuristic function that estimates the desirability of each node.
+            For a CSRGraph, anything indexable by node id, such as an array.
+        graph (dict or CSRGraph): The graph to search. Defaults to tree.
+        goal: The goal node, or a callable goal(node) -> bool.
+        visitor (SearchVisitor): Optional hooks; pass PrintVisitor() to print the expanded nodes.
 
     Returns:
-        None
+        tuple: (path, cost) to the goal, or (None, inf).
     """
-    queue = [(heuristic[root], root)]  # Initialize a priority queue with the root node and its heuristic value
-    while queue:
-        _, node = min(queue)  # Get the node with the minimum heuristic value
-        queue.remove((heuristic[node], node))  # Remove the node from the queue
-        print("Visited node:", node)  # Print the visited node
-        if node == goal:  # If the goal node is found
-            return
-        children = tree.get(node, np.array([]))  # Get the children of the current node
-        queue.extend([(heuristic[child], child) for child in children])  # Add the children to the queue
+    return heuristic_search(root, graph, goal, heuristic, cost_weight=0, reopen=True,
+                            visitor=visitor, phase="greedy")
 
 
 # Minimax
@@ -247,6 +800,137 @@ def build_minimax_tree():
     return root
 
 
+# Minimax on Flat Arrays
+# ------------------------------------------
+# A game tree stored level by level instead of as node objects. Node ids run
+# breadth-first: the root is 0, then every node of level 1, and so on. The
+# children of the nodes of one level are contiguous in the next level, in the
+# same order as their parents, so child_count alone fixes the shape.
+class ArrayGameTree:
+    """
+    Level-ordered game tree with three flat arrays:
+
+        child_count[i]   number of children of node i (0 for a leaf)
+        values[i]        value of node i, only read at leaves
+        level_offsets[l] id of the first node of level l; the last entry is the node count
+    """
+    def __init__(self, child_count, values, level_offsets=None):
+        self.child_count = np.asarray(child_count, dtype=np.int64)
+        self.values = np.asarray(values, dtype=np.float64)
+        if len(self.values) != len(self.child_count):
+            raise ValueError("values must have one entry per node")
+        if level_offsets is None:
+            level_offsets = [0, 1]  # Each level holds the children of the one before it
+            while level_offsets[-1] < len(self.child_count):
+                level_size = self.child_count[level_offsets[-2]:level_offsets[-1]].sum()
+                if level_size == 0:
+                    raise ValueError("child_count describes fewer nodes than given")
+                level_offsets.append(level_offsets[-1] + int(level_size))
+        self.level_offsets = np.asarray(level_offsets, dtype=np.int64)
+        if self.level_offsets[-1] != len(self.child_count):
+            raise ValueError("child_count describes more nodes than given")
+
+    @property
+    def num_nodes(self):
+        return len(self.child_count)
+
+    @property
+    def num_levels(self):
+        return len(self.level_offsets) - 1
+
+    @classmethod
+    def uniform(cls, branching, depth, leaf_values=None, seed=None):
+        """
+        Complete tree where every internal node has branching children.
+
+        Args:
+            branching (int): Children per internal node.
+            depth (int): Number of moves from the root to every leaf.
+            leaf_values (np.ndarray): branching ** depth leaf values, left to right;
+                random integers in [0, 100) when omitted.
+            seed (int): Seed for the random leaf values.
+        """
+        level_sizes = branching ** np.arange(depth + 1)
+        num_internal = int(level_sizes[:-1].sum())
+        num_leaves = int(level_sizes[-1])
+        if leaf_values is None:
+            leaf_values = np.random.default_rng(seed).integers(0, 100, num_leaves)
+        child_count = np.zeros(num_internal + num_leaves, dtype=np.int64)
+        child_count[:num_internal] = branching
+        values = np.zeros(num_internal + num_leaves)
+        values[num_internal:] = leaf_values
+        level_offsets = np.concatenate([[0], np.cumsum(level_sizes)])
+        return cls(child_count, values, level_offsets)
+
+    @classmethod
+    def from_levels(cls, level_child_counts, leaf_values):
+        """
+        Builds a tree from the child counts of each level and the leaf values.
+
+        Args:
+            level_child_counts (list): One array per level with the child count
+                of each node of that level, starting with [n] for the root.
+            leaf_values (np.ndarray): Values of the leaves, in breadth-first order.
+        """
+        child_count = np.concatenate([np.asarray(counts, dtype=np.int64) for counts in level_child_counts])
+        values = np.zeros(len(child_count))
+        values[child_count == 0] = leaf_values
+        return cls(child_count, values)
+
+    @classmethod
+    def from_node(cls, root):
+        """
+        Converts a tree of MinimaxNode objects, like build_minimax_tree() returns.
+        """
+        child_count, values = [], []
+        level = [root]
+        while level:
+            child_count.extend(len(node.children) for node in level)
+            values.extend(node.value for node in level)
+            level = [child for node in level for child in node.children]
+        return cls(child_count, values)
+
+    def evaluate(self, maximizing_player=True):
+        """
+        Minimax value of every node, computed bottom-up one level at a time.
+
+        Each level is a single segmented reduction over the level below:
+        np.maximum.reduceat on the maximizing player's levels, np.minimum.reduceat
+        on the others. Leaves keep their values.
+
+        Returns:
+            np.ndarray: The minimax value of each node; index 0 is the root.
+        """
+        scores = self.values.copy()
+        offsets = self.level_offsets
+        for level in range(self.num_levels - 2, -1, -1):
+            start, end = offsets[level], offsets[level + 1]
+            counts = self.child_count[start:end]
+            internal = counts > 0
+            if not internal.any():
+                continue
+            # Segment starts of each internal node's children within the next level
+            segment_starts = (np.cumsum(counts) - counts)[internal]
+            children = scores[end:offsets[level + 2]]
+            maximizing = (level % 2 == 0) == maximizing_player
+            reduce = np.maximum.reduceat if maximizing else np.minimum.reduceat
+            scores[start:end][internal] = reduce(children, segment_starts)
+        return scores
+
+def minimax_array(array_tree, maximizing_player):
+    """
+    Performs the Minimax algorithm on an ArrayGameTree.
+
+    Args:
+        array_tree (ArrayGameTree): The game tree.
+        maximizing_player (bool): True if the player at the root is maximizing, False otherwise.
+
+    Returns:
+        float: The optimal value.
+    """
+    return array_tree.evaluate(maximizing_player)[0]
+
+
 # Alpha-Beta Pruning
 # ------------------------------------------
 class AlphaBetaNode:
@@ -254,7 +938,7 @@ class AlphaBetaNode:
         self.value = value
         self.children = []
 
-def alphabeta(node, alpha, beta, maximizing_player):
+def alphabeta(node, alpha, beta, maximizing_player, visitor=None):
     """
     Performs the Alpha-Beta Pruning algorithm on the tree starting from the given node.
 
@@ -263,16 +947,19 @@ def alphabeta(node, alpha, beta, maximizing_player):
         alpha (float): The current alpha value.
         beta (float): The current beta value.
         maximizing_player (bool): True if the current player is maximizing, False otherwise.
+        visitor (SearchVisitor): Optional hooks; on_expand is called for every node visited.
 
     Returns:
         int: The optimal value.
     """
+    if visitor is not None:
+        visitor.on_expand(node, 0)
     if len(node.children) == 0:  # If the current node is a leaf node
         return node.value
     if maximizing_player:  # If the current player is maximizing
         value = -np.inf
         for child in node.children:
-            value = max(value, alphabeta(child, alpha, beta, False))  # Recursively call the algorithm with the child node and set maximizing player to False
+            value = max(value, alphabeta(child, alpha, beta, False, visitor))  # Recursively call the algorithm with the child node and set maximizing player to False
             alpha = max(alpha, value)  # Update the alpha value
             if alpha >= beta:  # Perform alpha-beta pruning
                 break
@@ -280,7 +967,7 @@ def alphabeta(node, alpha, beta, maximizing_player):
     else:  # If the current player is minimizing
         value = np.inf
         for child in node.children:
-            value = min(value, alphabeta(child, alpha, beta, True))  # Recursively call the algorithm with the child node and set maximizing player to True
+            value = min(value, alphabeta(child, alpha, beta, True, visitor))  # Recursively call the algorithm with the child node and set maximizing player to True
             beta = min(beta, value)  # Update the beta value
             if beta <= alpha:  # Perform alpha-beta pruning
                 break
@@ -305,14 +992,166 @@ def build_alphabeta_tree():
     return root
 
 
+# Game interface
+# ------------------------------------------
+# MCTS plays any game that implements Game. States must not be modified in
+# place: apply() returns a new state. reward() is a result in [0, 1] for the
+# player who made the last move into a terminal state. In alternating
+# (two-player, zero-sum) games the opponent's result is 1 - reward.
+class Game:
+    """
+    Protocol for the games MCTS can search. Subclasses implement the four
+    rules methods and may override rollout() with a batched evaluation.
+    """
+    alternating = False  # True when the players take turns and rewards flip every ply
+
+    def legal_moves(self, state):
+        """
+        Returns the list of moves available in state.
+        """
+        raise NotImplementedError
+
+    def apply(self, state, move):
+        """
+        Returns the state reached by playing move in state.
+        """
+        raise NotImplementedError
+
+    def is_terminal(self, state):
+        """
+        Returns True when the game is over in state.
+        """
+        raise NotImplementedError
+
+    def reward(self, state):
+        """
+        Returns the result of a terminal state for the player who moved into it.
+        """
+        raise NotImplementedError
+
+    def rollout(self, states):
+        """
+        Evaluates a batch of leaf states at once.
+
+        The default plays uniformly random moves from each state to the end of
+        the game. Override it with vectorised playouts or a batched model call.
+
+        Args:
+            states (list): Leaf states queued by mcts().
+
+        Returns:
+            np.ndarray: One result in [0, 1] per state, for the player who moved into it.
+        """
+        results = np.empty(len(states))
+        for i, state in enumerate(states):
+            plies = 0
+            while not self.is_terminal(state):
+                moves = self.legal_moves(state)
+                state = self.apply(state, moves[np.random.randint(len(moves))])
+                plies += 1
+            result = self.reward(state)
+            results[i] = 1 - result if self.alternating and plies % 2 else result
+        return results
+
+def toy_children(name):
+    """
+    Child states of a node of the sample tree.
+    """
+    return tree.get(name, NO_CHILDREN).tolist()
+
+def toy_reward(name):
+    """
+    Simulation result of a node of the sample tree: 1 (win) for 'I', 0 otherwise.
+    """
+    return 1 if name == 'I' else 0
+
+class ToyTreeGame(Game):
+    """
+    The sample tree as a one-player game: a move is the name of the child to go to.
+    Nodes are scored as they are, without playing on to a leaf.
+    """
+    def legal_moves(self, state):
+        return toy_children(state)
+
+    def apply(self, state, move):
+        return move
+
+    def is_terminal(self, state):
+        return not toy_children(state)
+
+    def reward(self, state):
+        return toy_reward(state)
+
+    def rollout(self, states):
+        return np.array([toy_reward(state) for state in states], dtype=np.float64)
+
+TOY_GAME = ToyTreeGame()  # Default game of MCTSTreeNode
+
+class TicTacToeGame(Game):
+    """
+    Tic-tac-toe with states as tuples of 9 squares: 0 empty, 1 X, -1 O. X moves first.
+    rollout() plays a whole batch of random games with array operations.
+    """
+    alternating = True
+    lines = np.array(WIN_LINES, dtype=np.intp)  # (8, 3) squares per line
+
+    def to_move(self, state):
+        return 1 if sum(state) == 0 else -1
+
+    def winner(self, state):
+        for a, b, c in WIN_LINES:
+            if state[a] != 0 and state[a] == state[b] == state[c]:
+                return state[a]
+        return 0
+
+    def legal_moves(self, state):
+        return [square for square in range(9) if state[square] == 0]
+
+    def apply(self, state, move):
+        board = list(state)
+        board[move] = self.to_move(state)
+        return tuple(board)
+
+    def is_terminal(self, state):
+        return self.winner(state) != 0 or 0 not in state
+
+    def reward(self, state):
+        return 1.0 if self.winner(state) != 0 else 0.5  # The last mover cannot have lost
+
+    def rollout(self, states):
+        boards = np.array(states, dtype=np.int8).reshape(-1, 9)
+        rows = np.arange(len(boards))
+        player = np.where(boards.sum(axis=1) == 0, 1, -1).astype(np.int8)  # Side to move
+        last_mover = -player
+
+        def winners():
+            lines = boards[:, self.lines].sum(axis=2)  # (N, 8) line sums
+            return np.where((lines == 3).any(axis=1), 1, np.where((lines == -3).any(axis=1), -1, 0))
+
+        winner = winners()
+        active = (winner == 0) & (boards == 0).any(axis=1)
+        while active.any():
+            # A random empty square on every unfinished board
+            keys = np.random.random(boards.shape)
+            keys[boards != 0] = -1
+            square = keys.argmax(axis=1)
+            boards[rows[active], square[active]] = player[active]
+            player = np.where(active, -player, player)
+            winner = winners()
+            active = (winner == 0) & (boards == 0).any(axis=1)
+        return np.where(winner == last_mover, 1.0, np.where(winner == 0, 0.5, 0.0))
+
+
 # Monte Carlo Tree Search (MCTS)
 # ------------------------------------------
 class MCTSTreeNode:
-    def __init__(self, name, wins, visits):
-        self.name = name  # Unique identifier for the node
-        self.wins = wins  # Number of wins recorded at this node
+    def __init__(self, name, wins, visits, game=None, move=None):
+        self.name = name  # Unique identifier for the node: the game state
+        self.wins = wins  # Number of wins recorded at this node, for the player who moved into it
         self.visits = visits  # Number of visits to this node
         self.children = []  # List of child nodes
+        self.game = game if game is not None else TOY_GAME  # Rules used to expand and simulate
+        self.move = move  # Move that led from the parent to this node
 
     def select_child_ucb(self, exploration_constant):
         """
@@ -324,6 +1163,9 @@ class MCTSTreeNode:
         Returns:
             MCTSTreeNode: The selected child node.
         """
+        for child in self.children:
+            if child.visits == 0:  # Unvisited children are tried first, before UCB divides by their visits
+                return child
         ucb_values = [
             child.wins / child.visits + exploration_constant * np.sqrt(np.log(self.visits) / child.visits)
             for child in self.children  # Compute UCB values for all children nodes
@@ -338,31 +1180,19 @@ class MCTSTreeNode:
         Returns:
             None
         """
-        if self.name == 'A':
-            self.children.append(MCTSTreeNode('B', 0, 0))
-            self.children.append(MCTSTreeNode('C', 0, 0))
-        elif self.name == 'B':
-            self.children.append(MCTSTreeNode('D', 0, 0))
-            self.children.append(MCTSTreeNode('E', 0, 0))
-        elif self.name == 'C':
-            self.children.append(MCTSTreeNode('F', 0, 0))
-            self.children.append(MCTSTreeNode('G', 0, 0))
-        elif self.name == 'D':
-            self.children.append(MCTSTreeNode('H', 0, 0))
-            self.children.append(MCTSTreeNode('I', 0, 0))
-        elif self.name == 'E' or self.name == 'F' or self.name == 'G' or self.name == 'H' or self.name == 'I':
-            pass
+        if self.game.is_terminal(self.name):
+            return
+        for move in self.game.legal_moves(self.name):
+            self.children.append(MCTSTreeNode(self.game.apply(self.name, move), 0, 0, self.game, move))
 
     def simulate(self):
         """
         Simulates a game play or outcome for the current node.
 
         Returns:
-            int: The result of the simulation.
+            float: The result of the simulation, for the player who moved into this node.
         """
-        if self.name == 'I':
-            return 1  # Return 1 (win) if the node's name is 'I
-        return 0  # Return 0 (loss) otherwise
+        return self.game.rollout([self.name])[0]
 
     def update(self, result):
         """
@@ -377,25 +1207,73 @@ class MCTSTreeNode:
         self.visits += 1
         self.wins += result
 
-def mcts(root, num_simulations):
+def mcts(root, num_simulations, batch_size=1, exploration_constant=1.4, visitor=None):
     """
     Performs the Monte Carlo Tree Search (MCTS) algorithm on the tree starting from the given root node.
 
+    Leaves are selected batch_size at a time and evaluated together with one
+    game.rollout() call before their results are backed up. While a batch is
+    being collected, every node on a selected path already counts the visit
+    (a virtual loss), which steers later selections in the batch elsewhere.
+
     Args:
         root (MCTSTreeNode): The root node for MCTS.
         num_simulations (int): The number of simulations to run.
+        batch_size (int): The number of leaves to evaluate per rollout() call.
+        exploration_constant (float): The exploration constant for UCB.
+        visitor (SearchVisitor): Optional hooks. on_expand() is called when a node
+            gets its children, with their number as the frontier, and the select,
+            rollout and backpropagate steps of each batch are reported as phases
+            within the 'mcts' phase.
 
     Returns:
         None
     """
-    for _ in range(num_simulations):
-        node = root  # Traverse down the tree until reaching a leaf node
-        while node.children:
-            node = node.select_child_ucb(1.4)
-        if node.visits > 0:  # If the node has been visited before, expand and simulate it
-            node.expand()
-            result = node.simulate()
-            node.update(result)
+    game = root.game
+    done = 0
+    if visitor is not None:
+        visitor.on_start("mcts")
+    while done < num_simulations:
+        if visitor is not None:
+            visitor.on_start("select")
+        paths = []
+        for _ in range(min(batch_size, num_simulations - done)):
+            node = root  # Traverse down the tree until reaching a leaf node
+            path = [node]
+            while node.children:
+                node = node.select_child_ucb(exploration_constant)
+                path.append(node)
+            if node.visits > 0 or node is root:  # If the node has been visited before, expand it
+                node.expand()
+                if node.children:
+                    if visitor is not None:
+                        visitor.on_expand(node.name, len(node.children))
+                        for child in node.children:
+                            visitor.on_discover(child.name, node.name)
+                    node = node.children[0]
+                    path.append(node)
+            for visited in path:
+                visited.visits += 1  # Virtual loss until the result is backed up
+            paths.append(path)
+        done += len(paths)
+        if visitor is not None:
+            visitor.on_finish("select")
+            visitor.on_start("rollout")
+
+        results = game.rollout([path[-1].name for path in paths])  # Evaluate the whole batch at once
+        if visitor is not None:
+            visitor.on_finish("rollout")
+            visitor.on_start("backpropagate")
+        for path, result in zip(paths, results.tolist()):
+            for node in reversed(path):  # Backpropagate from the leaf to the root
+                node.visits -= 1
+                node.update(result)
+                if game.alternating:
+                    result = 1 - result  # The parent was entered by the other player
+        if visitor is not None:
+            visitor.on_finish("backpropagate")
+    if visitor is not None:
+        visitor.on_finish("mcts")
 
 def build_mcts_tree():
     """
@@ -408,55 +1286,249 @@ def build_mcts_tree():
     return root  # Return the root of the tree
 
 
-# Example usage
+# Monte Carlo Tree Search (MCTS) on Arrays
 # ------------------------------------------
-root = 'A'  # The starting node
-goal = 'I'  # The goal node
-
-print("Depth-First Search (DFS):")
-dfs(root)  # Perform DFS starting from the root node
-
-print("\nBreadth-First Search (BFS):")
-bfs(root)  # Perform BFS starting from the root node
-
-print("\nUniform Cost Search (UCS):")
-ucs(root)  # Perform UCS starting from the root node
-
-print("\nIterative Deepening Depth-First Search (IDDFS):")
-iddfs(root, 3)  # Perform IDDFS starting from the root node with a depth limit of 3
-
-print("\nA* Search:")
-heuristic = {
-    'A': 6,
-    'B': 5,
-    'C': 4,
-    'D': 3,
-    'E': 2,
-    'F': 3,
-    'G': 4,
-    'H': 1,
-    'I': 0
-}  # Heuristic function that estimates the cost from each node to the goal node
-astar(root, heuristic)  # Perform A* Search starting from the root node with the specified heuristic function
-
-print("\nBest-First Search:")
-best_first(root, heuristic)  # Perform Best-First Search starting from the root node with the specified heuristic function
-
-print("\nGreedy Search:")
-greedy(root, heuristic)  # Perform Greedy Search starting from the root node with the specified heuristic function
-
-print("\nMinimax:")
-minimax_tree = build_minimax_tree()  # Build a sample tree for Minimax algorithm
-result = minimax(minimax_tree, True)  # Perform Minimax starting from the root node with maximizing player set to True
-print("Optimal value:", result)  # Print the optimal value determined by Minimax algorithm
-
-print("\nAlpha-Beta Pruning:")
-alphabeta_tree = build_alphabeta_tree()  # Build a sample tree for Alpha-Beta Pruning algorithm
-result = alphabeta(alphabeta_tree, -np.inf, np.inf, True)  # Perform Alpha-Beta Pruning starting from the root node with initial alpha and beta values
-print("Optimal value:", result)  # Print the optimal value determined by Alpha-Beta Pruning algorithm
-
-print("\nMonte Carlo Tree Search (MCTS):")
-mcts_tree = build_mcts_tree()  # Build a sample tree for Monte Carlo Tree Search algorithm
-mcts(mcts_tree, 1000)  # Perform MCTS starting from the root node with 1000 simulations
-best_child = max(mcts_tree.children, key=lambda child: child.visits)  # Select the child node with the maximum visits
-print("Best child node:", best_child.name)  # Print the name of the best child node according to MCTS
+class MCTSArrayTree:
+    """
+    Monte Carlo search tree kept as a struct of arrays instead of one object per node.
+
+    Node i has wins[i], visits[i] and parent[i]; its children are the contiguous
+    ids first_child[i] .. first_child[i] + child_count[i] - 1, so UCB selection
+    is a single vectorised argmax over one slice. states[i] holds the game state
+    of node i. The arrays grow by doubling when full.
+    """
+    def __init__(self, root_state, expand=toy_children, simulate=toy_reward, capacity=1024):
+        """
+        Args:
+            root_state: The game state at the root.
+            expand (callable): expand(state) -> list of child states.
+            simulate (callable): simulate(state) -> simulation result.
+            capacity (int): Number of nodes to preallocate.
+        """
+        self.expand_state = expand
+        self.simulate_state = simulate
+        self.wins = np.zeros(capacity)
+        self.visits = np.zeros(capacity, dtype=np.int64)
+        self.parent = np.full(capacity, -1, dtype=np.int64)
+        self.first_child = np.full(capacity, -1, dtype=np.int64)
+        self.child_count = np.zeros(capacity, dtype=np.int64)
+        self.states = [root_state]
+        self.size = 1  # Number of nodes in use
+        self.root = 0
+
+    def grow(self, needed):
+        """
+        Makes room for at least needed nodes, doubling the capacity as required.
+        """
+        capacity = len(self.visits)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name, fill in (("wins", 0), ("visits", 0), ("parent", -1), ("first_child", -1), ("child_count", 0)):
+            old = getattr(self, name)
+            new = np.full(capacity, fill, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def add_children(self, node, states):
+        """
+        Appends the children of node as one contiguous block of ids.
+        """
+        count = len(states)
+        self.grow(self.size + count)
+        start = self.size
+        self.parent[start:start + count] = node
+        self.first_child[node] = start
+        self.child_count[node] = count
+        self.states.extend(states)
+        self.size += count
+
+    def children(self, node):
+        """
+        Ids of the children of node.
+        """
+        start = self.first_child[node]
+        return np.arange(start, start + self.child_count[node])
+
+    def select_child(self, node, exploration_constant):
+        """
+        Selects the child of node with the highest UCB value. Unvisited children
+        score +inf, so the first of them is tried before any child is revisited.
+        """
+        start = self.first_child[node]
+        end = start + self.child_count[node]
+        visits = self.visits[start:end]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ucb = (self.wins[start:end] / visits
+                   + exploration_constant * np.sqrt(np.log(self.visits[node]) / visits))
+        ucb[visits == 0] = np.inf
+        return start + int(np.argmax(ucb))
+
+    def run(self, num_simulations, exploration_constant=1.4):
+        """
+        Runs selection, expansion, simulation and backpropagation num_simulations times.
+        """
+        for _ in range(num_simulations):
+            node = self.root
+            path = [node]
+            while self.child_count[node]:  # Selection
+                node = self.select_child(node, exploration_constant)
+                path.append(node)
+            if self.visits[node] > 0 or node == self.root:  # Expansion of a leaf seen before
+                states = self.expand_state(self.states[node])
+                if states:
+                    self.add_children(node, states)
+                    node = int(self.first_child[node])
+                    path.append(node)
+            result = self.simulate_state(self.states[node])  # Simulation
+            self.visits[path] += 1  # Backpropagation along the whole path at once
+            self.wins[path] += result
+
+    def best_child(self, node=None):
+        """
+        The most visited child of node (the root by default).
+        """
+        node = self.root if node is None else node
+        start = self.first_child[node]
+        return start + int(np.argmax(self.visits[start:start + self.child_count[node]]))
+
+    def reroot(self, node, compact=True):
+        """
+        Makes node the new root, keeping its subtree and statistics for the next move.
+
+        With compact, the subtree is copied to the front of the arrays in
+        breadth-first order (children stay contiguous) and the rest is freed;
+        otherwise the root pointer just moves. Returns the new root id.
+        """
+        self.parent[node] = -1
+        self.root = node
+        if not compact:
+            return node
+
+        # Breadth-first order of the subtree: the children blocks of a level,
+        # concatenated, form the next level
+        levels = [np.array([node])]
+        frontier = levels[0]
+        while True:
+            counts = self.child_count[frontier]
+            total = counts.sum()
+            if total == 0:
+                break
+            starts = self.first_child[frontier]
+            frontier = gather_ranges(starts, counts)
+            levels.append(frontier)
+        order = np.concatenate(levels)
+
+        new_id = np.full(self.size, -1, dtype=np.int64)
+        new_id[order] = np.arange(len(order))
+        has_children = self.child_count[order] > 0
+        self.wins[:len(order)] = self.wins[order]
+        self.visits[:len(order)] = self.visits[order]
+        parent = self.parent[order]
+        self.parent[:len(order)] = np.where(parent >= 0, new_id[np.maximum(parent, 0)], -1)
+        first_child = self.first_child[order]
+        self.first_child[:len(order)] = np.where(has_children, new_id[np.maximum(first_child, 0)], -1)
+        self.child_count[:len(order)] = self.child_count[order]
+        self.states = [self.states[i] for i in order.tolist()]
+
+        # Reset the freed slots
+        self.wins[len(order):self.size] = 0
+        self.visits[len(order):self.size] = 0
+        self.parent[len(order):self.size] = -1
+        self.first_child[len(order):self.size] = -1
+        self.child_count[len(order):self.size] = 0
+        self.size = len(order)
+        self.root = 0
+        return 0
+
+
+# Example usage
+if __name__ == "__main__":
+    root = 'A'  # The starting node
+    goal = 'I'  # The goal node
+    printer = PrintVisitor()  # Prints each visited node
+
+    print("Depth-First Search (DFS):")
+    dfs(root, visitor=printer)  # Perform DFS starting from the root node
+
+    print("\nBreadth-First Search (BFS):")
+    bfs(root, visitor=printer)  # Perform BFS starting from the root node
+
+    print("\nUniform Cost Search (UCS):")
+    ucs(root, visitor=printer)  # Perform UCS starting from the root node
+
+    dist, pred = ucs(root, target=goal)  # Stop once the goal node is settled
+    print("Path to goal:", reconstruct_path(pred, goal), "cost:", dist[goal])
+    print("Bidirectional:", bidirectional_ucs(root, goal))
+
+    print("\nIterative Deepening Depth-First Search (IDDFS):")
+    print(iddfs(root, 3, goal=goal, visitor=printer))  # Perform IDDFS starting from the root node with a depth limit of 3
+
+    print("\nBreadth-First Search (BFS) on a CSRGraph:")
+    csr_tree = CSRGraph.from_dict(tree)  # The same tree as flat arrays with integer node ids
+    bfs(csr_tree.id(root), csr_tree, visitor=PrintVisitor(csr_tree))  # Perform BFS starting from the id of the root node
+    depth, parent = bfs_levels(csr_tree.id(root), csr_tree)  # Hop distance and parent of every node
+    print("Depths:", dict(zip(csr_tree.names.tolist(), depth.tolist())))
+
+    print("\nA* Search:")
+    heuristic = {
+        'A': 6,
+        'B': 5,
+        'C': 4,
+        'D': 3,
+        'E': 2,
+        'F': 3,
+        'G': 4,
+        'H': 1,
+        'I': 0
+    }  # Heuristic function that estimates the cost from each node to the goal node
+    print(astar(root, heuristic, goal=goal, visitor=printer))  # Perform A* Search starting from the root node with the specified heuristic function
+
+    print("\nBest-First Search:")
+    print(best_first(root, heuristic, goal=goal, visitor=printer))  # Perform Best-First Search starting from the root node with the specified heuristic function
+
+    print("\nGreedy Search:")
+    print(greedy(root, heuristic, goal=goal, visitor=printer))  # Perform Greedy Search starting from the root node with the specified heuristic function
+
+    print("\nMinimax:")
+    minimax_tree = build_minimax_tree()  # Build a sample tree for Minimax algorithm
+    result = minimax(minimax_tree, True)  # Perform Minimax starting from the root node with maximizing player set to True
+    print("Optimal value:", result)  # Print the optimal value determined by Minimax algorithm
+
+    print("\nMinimax on flat arrays:")
+    array_tree = ArrayGameTree.from_node(minimax_tree)  # The same tree as level-ordered arrays
+    print("Optimal value:", minimax_array(array_tree, True))  # Output: 8.0
+    big_tree = ArrayGameTree.uniform(10, 6, seed=0)  # A million leaves, no node objects
+    print("Optimal value of a 10^6-leaf tree:", minimax_array(big_tree, True))
+
+    print("\nAlpha-Beta Pruning:")
+    alphabeta_tree = build_alphabeta_tree()  # Build a sample tree for Alpha-Beta Pruning algorithm
+    result = alphabeta(alphabeta_tree, -np.inf, np.inf, True)  # Perform Alpha-Beta Pruning starting from the root node with initial alpha and beta values
+    print("Optimal value:", result)  # Print the optimal value determined by Alpha-Beta Pruning algorithm
+
+    print("\nMonte Carlo Tree Search (MCTS) on arrays:")
+    mcts_arrays = MCTSArrayTree(root)  # Node statistics in preallocated arrays
+    mcts_arrays.run(1000)  # 1000 simulations
+    best = mcts_arrays.best_child()
+    print("Best child node:", mcts_arrays.states[best])
+    mcts_arrays.reroot(best)  # Keep the chosen subtree for the next move
+    mcts_arrays.run(100)
+    print("Best child node after re-rooting:", mcts_arrays.states[mcts_arrays.best_child()])
+
+    print("\nMonte Carlo Tree Search (MCTS):")
+    mcts_tree = build_mcts_tree()  # Build a sample tree for Monte Carlo Tree Search algorithm
+    stats = StatsVisitor()  # Counts and phase timings instead of output
+    mcts(mcts_tree, 1000, visitor=stats)  # Perform MCTS starting from the root node with 1000 simulations
+    best_child = max(mcts_tree.children, key=lambda child: child.visits)  # Select the child node with the maximum visits
+    print("Best child node:", best_child.name)  # Print the name of the best child node according to MCTS
+    print("Expansions:", stats.expansions, "phases:", sorted(stats.elapsed))
+
+    print("\nMCTS on tic-tac-toe with batched rollouts:")
+    board = (0, 0, 0,
+             0, -1, 0,
+             1, 1, -1)  # X to move must block O's diagonal on square 0
+    ttt_root = MCTSTreeNode(board, 0, 0, TicTacToeGame())
+    mcts(ttt_root, 2000, batch_size=64)  # 64 random playouts per array operation
+    best_child = max(ttt_root.children, key=lambda child: child.visits)
+    print("Best move:", best_child.move)  # Output: 0
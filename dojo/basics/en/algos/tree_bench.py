@@ -0,0 +1,265 @@
+"""
+Benchmark for the graph searches in tree.py on large synthetic graphs.
+
+Generates deterministic grid, random geometric and scale-free graphs, runs
+each search on them in a fresh process and writes wall time, peak RSS and
+expansions per second as JSON, so search variants can be compared at
+realistic sizes. Run from this directory:
+
+    python tree_bench.py --sizes 1000 10000 100000 --output tree_bench.json
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from graph import CSRGraph, gather_ranges, open_graph, save_graph
+from tree import StatsVisitor, astar, best_first, bfs, bfs_levels, bidirectional_ucs, dfs, greedy, iddfs, ucs
+
+# Graph generators
+# ------------------------------------------
+# Every generator is deterministic for a given seed and returns a CSRGraph with
+# edges in both directions. Grid and geometric graphs carry node coordinates,
+# and their edge weights are at least the straight-line length of the edge, so
+# the Euclidean distance is an admissible A* heuristic on them.
+def grid_graph(n, seed=0):
+    """
+    Square grid with about n nodes, 4-connected, weights in [1, 2) per unit step.
+    """
+    rng = np.random.default_rng(seed)
+    side = max(2, math.ceil(math.sqrt(n)))
+    ids = np.arange(side * side).reshape(side, side)
+    pairs = np.concatenate([np.column_stack([ids[:, :-1].ravel(), ids[:, 1:].ravel()]),
+                            np.column_stack([ids[:-1].ravel(), ids[1:].ravel()])])
+    weights = rng.uniform(1, 2, len(pairs))
+    coords = np.column_stack([ids.ravel() % side, ids.ravel() // side]).astype(np.float64)
+    return CSRGraph.from_edges(np.concatenate([pairs[:, 0], pairs[:, 1]]),
+                               np.concatenate([pairs[:, 1], pairs[:, 0]]),
+                               np.concatenate([weights, weights]), side * side, coords=coords)
+
+def geometric_graph(n, degree=8, seed=0):
+    """
+    n random points in the unit square, joined when closer than the radius that
+    gives the requested average degree. Weights are the edge lengths.
+
+    Neighbours are found by binning the points into cells of the radius and
+    comparing each point with the 9 cells around it, one offset at a time.
+    Nodes are numbered cell by cell.
+    """
+    rng = np.random.default_rng(seed)
+    points = rng.random((n, 2))
+    radius = math.sqrt(degree / (math.pi * n))
+    cells = max(1, int(1 / radius))
+    cell_xy = np.minimum((points * cells).astype(np.int64), cells - 1)
+    cell = cell_xy[:, 0] * cells + cell_xy[:, 1]
+    order = np.argsort(cell, kind="stable")
+    points, cell_xy, cell = points[order], cell_xy[order], cell[order]
+    counts = np.bincount(cell, minlength=cells * cells)
+    starts = np.cumsum(counts) - counts
+
+    sources, targets = [], []
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            nx, ny = cell_xy[:, 0] + dx, cell_xy[:, 1] + dy
+            valid = (nx >= 0) & (nx < cells) & (ny >= 0) & (ny < cells)
+            neighbour = np.where(valid, nx * cells + ny, 0)
+            candidates = np.where(valid, counts[neighbour], 0)
+            src = np.repeat(np.arange(n), candidates)
+            dst = gather_ranges(starts[neighbour], candidates)
+            keep = (src != dst) & (np.hypot(*(points[src] - points[dst]).T) <= radius)
+            sources.append(src[keep])
+            targets.append(dst[keep])
+    sources, targets = np.concatenate(sources), np.concatenate(targets)
+    weights = np.hypot(*(points[sources] - points[targets]).T)
+    return CSRGraph.from_edges(sources, targets, weights, n, coords=points)
+
+def scale_free_graph(n, degree=8, exponent=2.5, seed=0):
+    """
+    Configuration-model graph with a power-law degree distribution
+    P(k) ~ k^-exponent and the requested average degree. Each node gets its
+    expected degree in edge stubs (rounded at random), and a random permutation
+    of all stubs pairs them into edges, so the graph is sampled with a few
+    array operations. Self-loops are dropped. Weights are uniform in [1, 10).
+    """
+    rng = np.random.default_rng(seed)
+    expected = (np.arange(n) + 1.0) ** (-1 / (exponent - 1))
+    expected *= degree / expected.mean()
+    stubs = np.floor(expected).astype(np.int64) + (rng.random(n) < expected % 1)
+    ends = rng.permutation(np.repeat(np.arange(n), stubs))
+    sources, targets = ends[0:len(ends) - 1:2], ends[1::2]
+    keep = sources != targets
+    sources, targets = sources[keep], targets[keep]
+    weights = rng.uniform(1, 10, len(sources))
+    return CSRGraph.from_edges(np.concatenate([sources, targets]), np.concatenate([targets, sources]),
+                               np.concatenate([weights, weights]), n)
+
+GENERATORS = {
+    "grid": grid_graph,
+    "geometric": geometric_graph,
+    "scale_free": scale_free_graph,
+}
+
+def endpoints(graph):
+    """
+    Source and target of the goal-directed searches: node 0 and the node
+    farthest from it in the plane, or the last node without coordinates.
+    """
+    if graph.coords is None:
+        return 0, graph.num_nodes - 1
+    return 0, int(np.argmax(np.hypot(*(graph.coords - graph.coords[0]).T)))
+
+# Searches
+# ------------------------------------------
+ALGORITHMS = ["dfs", "bfs", "bfs_levels", "ucs", "bidirectional_ucs", "astar", "best_first", "greedy", "iddfs"]
+IDDFS_DEPTH = 8
+
+def run_search(algorithm, graph, source, target, heuristic, visitor):
+    """
+    Run one search.
+
+    bfs_levels() is timed next to bfs() as its array-based equivalent; it
+    takes no visitor, so its expansions are the nodes it reaches. iddfs runs
+    to a fixed depth with transpositions, since on long paths its time grows
+    with the cube of the depth.
+
+    Returns:
+        int: Nodes expanded, or None for a search that takes no visitor.
+    """
+    if algorithm == "dfs":
+        dfs(source, graph, visitor)
+    elif algorithm == "bfs":
+        bfs(source, graph, visitor)
+    elif algorithm == "bfs_levels":
+        return int((bfs_levels(source, graph)[0] >= 0).sum())  # One expansion per reached node
+    elif algorithm == "ucs":
+        ucs(source, graph, visitor=visitor)
+    elif algorithm == "bidirectional_ucs":
+        bidirectional_ucs(source, target, graph)
+        return None
+    elif algorithm == "astar":
+        astar(source, heuristic, graph, target, visitor)
+    elif algorithm == "best_first":
+        best_first(source, heuristic, graph, target, visitor)
+    elif algorithm == "greedy":
+        greedy(source, heuristic, graph, target, visitor)
+    elif algorithm == "iddfs":
+        iddfs(source, IDDFS_DEPTH, graph, transpositions=True, visitor=visitor)
+    else:
+        raise ValueError(f"unknown algorithm {algorithm!r}")
+    return visitor.expansions
+
+def peak_rss_mb():
+    """
+    Peak resident set size of this process in MB.
+
+    Linux reports it as VmHWM, which starts afresh in a new program; ru_maxrss
+    would carry over the parent's peak through fork and exec. Elsewhere
+    ru_maxrss is used (KB on most systems, bytes on macOS).
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2 ** 20
+
+def _run_one(path, algorithm, source, target, queue):
+    """
+    Child process: open the graph file, run one search and report its numbers.
+    """
+    graph = open_graph(path)
+    if graph.coords is None:
+        heuristic = np.zeros(graph.num_nodes)
+    else:
+        heuristic = np.hypot(*(graph.coords - graph.coords[target]).T)
+    setup_rss = peak_rss_mb()
+    visitor = StatsVisitor()
+    start = time.perf_counter()
+    expansions = run_search(algorithm, graph, source, target, heuristic, visitor)
+    wall_time = time.perf_counter() - start
+    queue.put({
+        "wall_time": wall_time,
+        "setup_rss_mb": setup_rss,
+        "peak_rss_mb": peak_rss_mb(),
+        "expansions": expansions,
+        "expansions_per_sec": expansions / wall_time if expansions and wall_time > 0 else None,
+        "peak_frontier": visitor.peak_frontier or None,
+    })
+
+def run_isolated(context, path, algorithm, source, target, timeout):
+    """
+    Run one search in a fresh process, so its peak RSS is its own.
+    """
+    queue = context.Queue()
+    process = context.Process(target=_run_one, args=(path, algorithm, source, target, queue))
+    process.start()
+    try:
+        return queue.get(timeout=timeout)
+    except Exception:
+        return {"error": "timeout" if process.is_alive() else f"exit code {process.exitcode}"}
+    finally:
+        if process.is_alive():
+            process.terminate()
+        process.join()
+
+def run_benchmark(graphs, sizes, algorithms, timeout=600, seed=0):
+    """
+    Generate each graph at each size and run every algorithm on it.
+
+    Returns:
+        dict: JSON-ready results with one record per (graph, size, algorithm).
+    """
+    results = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "seed": seed,
+        "records": [],
+    }
+    context = multiprocessing.get_context("spawn")  # Children start without the parent's memory
+    with tempfile.TemporaryDirectory() as tmp:
+        for kind in graphs:
+            for size in sizes:
+                start = time.perf_counter()
+                graph = GENERATORS[kind](size, seed=seed)
+                generate_time = time.perf_counter() - start
+                path = os.path.join(tmp, f"{kind}_{size}.graph")
+                save_graph(path, graph)  # Children map it instead of rebuilding it
+                source, target = endpoints(graph)
+                nodes, edges = graph.num_nodes, graph.num_edges
+                del graph
+                for algorithm in algorithms:
+                    record = run_isolated(context, path, algorithm, source, target, timeout)
+                    results["records"].append({"graph": kind, "size": size, "nodes": nodes, "edges": edges,
+                                               "generate_time": generate_time, "algorithm": algorithm, **record})
+                    print(f"{kind:10s} {nodes:9d} {algorithm:18s} "
+                          + (f"{record['wall_time']:9.3f} s {record['peak_rss_mb']:8.1f} MB"
+                             if "error" not in record else record["error"]), flush=True)
+                os.remove(path)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--output", default="tree_bench.json", help="JSON results file")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10 ** 3, 10 ** 4, 10 ** 5],
+                        help="approximate node counts, up to 10^7")
+    parser.add_argument("--graphs", nargs="+", default=list(GENERATORS), choices=list(GENERATORS))
+    parser.add_argument("--algorithms", nargs="+", default=ALGORITHMS, choices=ALGORITHMS)
+    parser.add_argument("--timeout", type=float, default=600, help="seconds per search before it is stopped")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    results = run_benchmark(args.graphs, args.sizes, args.algorithms, args.timeout, args.seed)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
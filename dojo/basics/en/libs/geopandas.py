@@ -7,6 +7,7 @@ import pygeos
 import rasterio
 from rasterio.warp import calculate_default_transform, reproject, Resampling
 import os
+from spatial_index import SpatialIndexCache, index_path, overlay, sjoin  # From ../algos, on PYTHONPATH
 
 # URLs to download GeoJSON and TIFF files
 urls = [
@@ -51,6 +52,8 @@ buffered_gdf = gdf.buffer(distance=1)  # Create a buffer around the geometries
 gdf1 = gdf.copy()
 gdf2 = gdf.copy()
 result = gpd.overlay(gdf1, gdf2, how='intersection')  # Perform an intersection between two GeoDataFrames
+index_cache = SpatialIndexCache()  # Keeps each layer's spatial index for later joins
+result = overlay(gdf1, gdf2, how='intersection', cache=index_cache)  # Same overlay, gdf2's index built once and kept
 
 # 1.9 Aggregation with Dissolve: Blending the Spatial Essence
 gdf['category'] = ['cat1', 'cat2', 'cat1']
@@ -105,7 +108,12 @@ gdf.to_file('output.geojson', driver='GeoJSON')  # Save the GeoDataFrame as a Ge
 # 3.4 Tools: Unleashing High-level Spatial Mastery
 gdf1 = gpd.read_file('sample.json')  # Load a GeoJSON file as a GeoDataFrame
 gdf2 = gpd.read_file('sample.json')  # Load a GeoJSON file as a GeoDataFrame
-joined = gpd.sjoin(gdf1, gdf2, how='inner', op='intersects')  # Perform a spatial join between two GeoDataFrames
+joined = gpd.sjoin(gdf1, gdf2, how='inner', predicate='intersects')  # Perform a spatial join between two GeoDataFrames
+# Joining against the same layer again reuses its index instead of building a new STRtree each time;
+# with right_path the index is also saved next to the file (sample.json.sidx.npz) and loaded in later runs
+joined = sjoin(gdf1, gdf2, how='inner', predicate='intersects', cache=index_cache, right_path='sample.json')
+joined = sjoin(gdf2, gdf1, how='inner', predicate='intersects', cache=index_cache, right_path='sample.json')
+print(index_cache.builds, index_cache.loads, index_cache.hits, index_path('sample.json'))  # Index builds, loads and cache hits
 
 # Print the loaded GeoDataFrame
 print(gdf)